@@ -0,0 +1,118 @@
+import math
+import multiprocessing
+from collections import deque
+
+import graphAlgorithms
+
+# state of a worker process, set once by _initWorker so the graph is not sent again with every task
+_graph = None
+_costs = None
+_algorithm = None
+_potential = None
+
+
+def _initWorker(graph, costs, algorithm, potential):
+    global _graph, _costs, _algorithm, _potential
+    _graph = graph
+    _costs = costs
+    _algorithm = algorithm
+    _potential = potential
+
+
+def _singleSource(s):
+    '''
+    Runs the configured single source search in the current process
+    :return: the source and a dictionary with the distances of the vertices reached from it
+    '''
+    if _algorithm == "bfs":
+        return s, graphAlgorithms.BFS(_graph, s)[0]
+    dist = graphAlgorithms.Dijkstra(_graph, _costs, s)[0]
+    if _potential is not None:
+        hs = _potential[s]
+        dist = {v: d - hs + _potential[v] for v, d in dist.items()}
+    return s, dist
+
+
+def johnsonPotential(G, w):
+    '''
+    Computes the vertex potentials of Johnson's algorithm: the distances from a virtual source linked
+    to every vertex with a zero cost edge, found with the queue based Bellman-Ford
+    :param G: the graph
+    :param w: a dictionary (x, y) -> cost
+    :return: a dictionary vertex -> potential h, such that w[(x, y)] + h[x] - h[y] >= 0 for every edge;
+        None if the graph has a negative cost cycle
+    '''
+    n = G.getVerticesNumber()
+    h = {v: 0 for v in G.getVertices()}
+    length = {v: 0 for v in h}
+    queue = deque(h)
+    queued = set(h)
+    while queue:
+        x = queue.popleft()
+        queued.discard(x)
+        for y in G.getOutbound(x):
+            nd = h[x] + w[(x, y)]
+            if nd < h[y]:
+                h[y] = nd
+                length[y] = length[x] + 1
+                if length[y] >= n:
+                    return None
+                if y not in queued:
+                    queued.add(y)
+                    queue.append(y)
+    return h
+
+
+def shortestPathsFrom(G, sources=None, algorithm="dijkstra", processes=None, chunksize=16):
+    '''
+    Runs one single source search per source and streams the results as they are ready
+    The graph and costs are handed to every worker process once, when the pool starts
+    (inherited without any copy where the fork start method is available), never per source
+    :param G: the graph, it must not be changed while the generator is running
+    :param sources: the starting vertices, all the vertices of G if None
+    :param algorithm: "dijkstra" for lowest costs (no cost may be negative), "bfs" for the number of edges,
+        or "johnson" for lowest costs on graphs with negative costs but no negative cost cycle:
+        the costs are reweighted once and every source then runs Dijkstra
+    :param processes: the number of worker processes, os.cpu_count() if None; 1 runs everything in this process
+    :param chunksize: the number of sources sent to a worker at a time
+    :return: yields (source, distances) in the order of sources, distances being a dictionary
+        with the vertices reached from the source
+    Raises ValueError for an unknown algorithm or if "johnson" finds a negative cost cycle
+    '''
+    if algorithm not in ("dijkstra", "bfs", "johnson"):
+        raise ValueError("unknown algorithm " + str(algorithm))
+    if sources is None:
+        sources = list(G.getVertices())
+    costs = G.getCosts()
+    potential = None
+    if algorithm == "johnson":
+        potential = johnsonPotential(G, costs)
+        if potential is None:
+            raise ValueError("the graph has a negative cost cycle")
+        costs = {(x, y): c + potential[x] - potential[y] for (x, y), c in costs.items()}
+    initargs = (G, costs, algorithm, potential)
+
+    if processes == 1:
+        _initWorker(*initargs)
+        for s in sources:
+            yield _singleSource(s)
+        return
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(processes, initializer=_initWorker, initargs=initargs) as pool:
+        for result in pool.imap(_singleSource, sources, chunksize):
+            yield result
+
+
+def distanceMatrix(G, sources=None, algorithm="dijkstra", processes=None):
+    '''
+    All pairs (or many sources) distances, see shortestPathsFrom for the parameters
+    :return: a dictionary source -> dictionary vertex -> distance, math.inf for the vertices
+        that can't be reached from the source
+    '''
+    vertices = list(G.getVertices())
+    matrix = {}
+    for s, dist in shortestPathsFrom(G, sources, algorithm, processes):
+        matrix[s] = {v: dist.get(v, math.inf) for v in vertices}
+    return matrix
@@ -0,0 +1,430 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import allPairs
+import floydWarshall
+import generators
+import graphAlgorithms
+import graphProtocol
+import instrumentation
+import tsp
+from csrGraph import CSRGraph
+from frontierBFS import frontierBFS
+from graph import DirectedGraph, UndirectedGraph
+
+FAMILIES = ("er", "rmat", "grid", "dag")
+# 10M edges is left out of the default sizes: the suite loads every graph as a DirectedGraph and an
+# UndirectedGraph, about 760 MB of dictionaries for 1M edges, so 10M edges needs over 7 GB;
+# ask for it with --sizes 10000000 on a machine with enough memory
+SIZES = (1000, 10000, 100000, 1000000)
+# BellmanFord is O(V * E), it is skipped above this many vertex * edge steps
+BELLMAN_FORD_LIMIT = 2 * 10 ** 7
+
+
+def measure(build):
+    '''
+    Runs build() and returns its result, the time it took and the memory it kept allocated
+    '''
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def timeTraversal(g, sources):
+    '''
+    Returns the time needed to run BFS from every given source and to read every edge cost
+    '''
+    start = time.perf_counter()
+    for s in sources:
+        graphAlgorithms.BFS(g, s)
+    bfsTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for x in g.getVertices():
+        for y in g.getOutbound(x):
+            g.getCost(x, y)
+    costTime = time.perf_counter() - start
+    return bfsTime, costTime
+
+
+def benchmarkLoad(filename="10k.txt"):
+    '''
+    Times the bulk loaders of DirectedGraph and CSRGraph on the same file
+    '''
+    for name, load in (("DirectedGraph", DirectedGraph), ("CSRGraph", CSRGraph.fromFile)):
+        start = time.perf_counter()
+        load(filename)
+        print("%s: loaded %s in %.3fs" % (name, filename, time.perf_counter() - start))
+
+
+def benchmarkCSR(filename="10k.txt", sources=10):
+    '''
+    Compares memory and traversal speed of DirectedGraph and CSRGraph on the same file
+    '''
+    dictGraph, loadTime, dictSize = measure(lambda: DirectedGraph(filename))
+    csrGraph, buildTime, csrSize = measure(lambda: CSRGraph.fromDirectedGraph(dictGraph))
+
+    print("DirectedGraph: loaded in %.3fs, %.1f MB" % (loadTime, dictSize / 2 ** 20))
+    print("CSRGraph: built in %.3fs, %.1f MB" % (buildTime, csrSize / 2 ** 20))
+
+    for name, g in (("DirectedGraph", dictGraph), ("CSRGraph", csrGraph)):
+        bfsTime, costTime = timeTraversal(g, range(sources))
+        print("%s: %d x BFS %.3fs, all edge costs %.3fs" % (name, sources, bfsTime, costTime))
+
+
+def benchmarkShortestPaths(filename="1k.txt", queries=20, seed=0):
+    '''
+    Times point to point lowest cost queries with BellmanFord, Dijkstra and bidirectional Dijkstra
+    '''
+    g = DirectedGraph(filename)
+    w = g.getCosts()
+    rnd = random.Random(seed)
+    pairs = [(rnd.randrange(g.getVerticesNumber()), rnd.randrange(g.getVerticesNumber())) for _ in range(queries)]
+
+    start = time.perf_counter()
+    graphAlgorithms.BellmanFord(g, w, pairs[0][0])
+    print("BellmanFord: 1 source %.3fs" % (time.perf_counter() - start))
+    for name, query in (("Dijkstra", lambda s, t: graphAlgorithms.Dijkstra(g, w, s, t)),
+                        ("bidirectionalDijkstra", lambda s, t: graphAlgorithms.bidirectionalDijkstra(g, w, s, t))):
+        start = time.perf_counter()
+        for s, t in pairs:
+            query(s, t)
+        print("%s: %.2f ms per query" % (name, (time.perf_counter() - start) * 1000 / queries))
+
+
+def benchmarkAllPairs(filename="1k.txt", sources=200, processes=None):
+    '''
+    Measures what it costs to ship each graph representation to a worker process and compares
+    serial and process pool multi source Dijkstra
+    '''
+    dictGraph = DirectedGraph(filename)
+    for name, g in (("DirectedGraph", dictGraph), ("CSRGraph", CSRGraph.fromDirectedGraph(dictGraph))):
+        start = time.perf_counter()
+        data = pickle.dumps(g)
+        pickle.loads(data)
+        print("%s: pickle round trip %.3fs, %.1f MB" % (name, time.perf_counter() - start, len(data) / 2 ** 20))
+
+    for count in (1, processes):
+        start = time.perf_counter()
+        for _ in allPairs.shortestPathsFrom(dictGraph, range(sources), processes=count):
+            pass
+        elapsed = time.perf_counter() - start
+        print("%s processes: %d sources in %.3fs, %.0f sources/s" % (count or "all", sources, elapsed, sources / elapsed))
+
+
+def benchmarkAllPairsDense(vertices=500, density=0.2, directory="benchmarkGraphs", seed=0, sources=50):
+    '''
+    Compares FloydWarshall against one BellmanFord per vertex on a generated dense graph
+    (an Erdős–Rényi graph with density * vertices^2 edges), checking that they agree
+    BellmanFord is only run from some sources, its time for all of them is extrapolated
+    '''
+    os.makedirs(directory, exist_ok=True)
+    edges = int(density * vertices * vertices)
+    filename = os.path.join(directory, "dense-%d-%d-%d.txt" % (vertices, edges, seed))
+    if not os.path.exists(filename):
+        generators.writeEdgeList(filename, vertices, edges, generators.erdosRenyi(vertices, edges, seed))
+    g = DirectedGraph(filename)
+    start = time.perf_counter()
+    order, dist, pred = floydWarshall.FloydWarshall(g)
+    floydTime = time.perf_counter() - start
+    print("%d vertices, %d edges: FloydWarshall %.3fs" % (g.getVerticesNumber(), len(g.getCosts()), floydTime))
+
+    index = {v: i for i, v in enumerate(order)}
+    sample = random.Random(seed).sample(order, min(sources, len(order)))
+    wrong = 0
+    start = time.perf_counter()
+    for s in sample:
+        reached = graphAlgorithms.BellmanFord(g, g.getCosts(), s)[0]
+        row = dist[index[s]]
+        wrong += any(row[index[v]] != d for v, d in reached.items())
+    bellmanTime = (time.perf_counter() - start) * len(order) / len(sample)
+    print("BellmanFord from every vertex: %.3fs (extrapolated from %d sources), %.1fx slower%s"
+          % (bellmanTime, len(sample), bellmanTime / floydTime, " WRONG" if wrong else ""))
+
+
+def benchmarkMutations(edges=100000):
+    '''
+    Mutation heavy workload on a hub vertex: adds, looks up and removes edges one at a time
+    '''
+    g = DirectedGraph("smallTest.txt")
+    hub = 0
+    targets = range(10, 10 + edges)
+
+    start = time.perf_counter()
+    for y in targets:
+        g.addEdge(hub, y, 1)
+        g.addEdge(y, hub, 1)
+    print("addEdge: %.0f edges/s" % (2 * edges / (time.perf_counter() - start)))
+
+    start = time.perf_counter()
+    for y in targets:
+        g.edgeExists(hub, y)
+        g.getCost(y, hub)
+    print("edgeExists + getCost: %.0f lookups/s" % (2 * edges / (time.perf_counter() - start)))
+
+    start = time.perf_counter()
+    for y in targets:
+        g.removeEdge(hub, y)
+    g.removeVertex(hub)
+    print("removeEdge + removeVertex: %.0f edges/s" % (2 * edges / (time.perf_counter() - start)))
+
+
+def benchmarkBackends(filename="1k.txt"):
+    '''
+    Conformance and performance matrix: every storage backend is checked against DirectedGraph
+    and timed on the same algorithms
+    '''
+    reference = DirectedGraph(filename)
+    algorithms = (("BFS", lambda g: graphAlgorithms.BFS(g, 0)[0]),
+                  ("DFS", lambda g: graphAlgorithms.DFS(g)),
+                  ("Dijkstra", lambda g: graphAlgorithms.Dijkstra(g, g.getCosts(), 0)[0]),
+                  ("SPFA", lambda g: graphAlgorithms.SPFA(g, g.getCosts(), 0)[0]),
+                  ("topologicalSortKahn", lambda g: graphAlgorithms.topologicalSortKahn(g) is None))
+    expected = {name: run(reference) for name, run in algorithms}
+    print("backend".ljust(10) + "".join(name.rjust(22) for name, run in algorithms) + "  conformance")
+    for backend in graphProtocol.BACKENDS:
+        g = graphProtocol.toBackend(reference, backend)
+        cells = []
+        for name, run in algorithms:
+            start = time.perf_counter()
+            result = run(g)
+            elapsed = time.perf_counter() - start
+            cells.append(("%.3fs%s" % (elapsed, "" if result == expected[name] else " WRONG")).rjust(22))
+        problems = graphProtocol.checkConformance(g, reference)
+        print(backend.ljust(10) + "".join(cells) + "  " + ("ok" if not problems else ", ".join(problems[:5])))
+
+
+def _validBFS(g, result, expected):
+    '''
+    Tells whether a BFS result has the expected distances and a valid BFS parent for every vertex
+    '''
+    distances, parent = result
+    if distances != expected[0] or parent.keys() != expected[1].keys():
+        return False
+    return all(distances[v] == 0 if x is None else distances[x] == distances[v] - 1 and g.edgeExists(x, v)
+               for v, x in parent.items())
+
+
+def benchmarkFrontierBFS(edges=10 ** 7, family="rmat", directory="benchmarkGraphs", seed=0, sources=3, processes=1):
+    '''
+    Compares BFS and the direction optimizing frontierBFS on a generated graph loaded as a CSRGraph,
+    checking that they agree and counting the edges each one scans
+    '''
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, "%s-%d-%d.txt" % (family, edges, seed))
+    if not os.path.exists(filename):
+        generators.generate(family, edges, filename, seed)
+    g = CSRGraph.fromFile(filename)
+    for s in range(sources):
+        start = time.perf_counter()
+        expected = graphAlgorithms.BFS(g, s)
+        bfsTime = time.perf_counter() - start
+        with instrumentation.instrument() as stats:
+            start = time.perf_counter()
+            result = frontierBFS(g, s, processes=processes)
+            frontierTime = time.perf_counter() - start
+        scanned = sum(g.getOutDegree(v) for v in expected[0])
+        print("source %d: %d vertices, BFS %.3fs / %d edges, frontierBFS %.3fs / %d edges (%.2fx), "
+              "%d bottom-up levels%s"
+              % (s, len(expected[0]), bfsTime, scanned, frontierTime, stats.counters["edgeScans"],
+                 bfsTime / frontierTime, stats.counters["bottomUpLevels"],
+                 "" if _validBFS(g, result, expected) else " WRONG"))
+
+
+def peakRSS():
+    '''
+    Returns the peak resident memory of this process in KB, None where the platform can't tell
+    '''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(sortedTimes, p):
+    '''
+    Nearest-rank percentile: the smallest time that at least p percent of the times do not exceed
+    '''
+    return sortedTimes[max(0, math.ceil(p / 100 * len(sortedTimes)) - 1)]
+
+
+def suiteCases(filename):
+    '''
+    Returns the cases run on one graph file as (name, items processed per run, function)
+    '''
+    g = DirectedGraph(filename)
+    ug = UndirectedGraph(filename)
+    n = g.getVerticesNumber()
+    m = len(g.getCosts())
+    costs = g.getCosts()
+
+    def neighbours():
+        for x in g.getVertices():
+            for y in g.getOutbound(x):
+                pass
+
+    def costLookup():
+        for x in g.getVertices():
+            for y in g.getOutbound(x):
+                g.getCost(x, y)
+
+    cases = [("load", m, lambda: DirectedGraph(filename)),
+             ("neighbours", m, neighbours),
+             ("costLookup", m, costLookup),
+             ("BFS", n, lambda: graphAlgorithms.BFS(g, 0)),
+             ("DFS", n, lambda: graphAlgorithms.DFS(g)),
+             ("topologicalSortKahn", n, lambda: graphAlgorithms.topologicalSortKahn(g)),
+             ("hamiltonianNN", n, lambda: tsp.nearestNeighbourTour(ug, 0))]
+    if n * m <= BELLMAN_FORD_LIMIT:
+        cases.append(("BellmanFord", m, lambda: graphAlgorithms.BellmanFord(g, costs, 0)))
+    tour = tsp.nearestNeighbourTour(ug, 0)
+    if tour is not None:
+        neighbourLists = tsp.neighbourLists(ug)
+        cases.append(("twoOpt", n, lambda: tsp.twoOpt(ug, list(tour), neighbourLists)))
+    return cases
+
+
+def _runCase(filename, position, repeat):
+    '''
+    Runs one case of suiteCases(filename), in a process of its own so that its peak RSS is its own
+    :return: the name of the case, the items it processes, the sorted times, the peak RSS in KB once the graphs
+        were loaded and after the case; None if there is no case at this position
+    '''
+    cases = suiteCases(filename)
+    if position >= len(cases):
+        return None
+    case, items, run = cases[position]
+    setupRSS = peakRSS()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return case, items, sorted(times), setupRSS, peakRSS()
+
+
+def runSuite(families=FAMILIES, sizes=SIZES, repeat=10, directory="benchmarkGraphs", seed=0):
+    '''
+    Generates one graph per family and size (reusing files already generated) and times every case on it
+    Every case runs in a fresh process, which loads the graphs again, so that the peak RSS belongs to the case
+    :param repeat: the number of runs of every case; p90 is only reported from 10 runs and p99 from 100,
+        with fewer runs they would just be the maximum
+    :return: a JSON-ready dictionary with one result per graph and case: timings in seconds, throughput in
+        items per second at the median, and the peak RSS of the process running the case, once the graphs
+        were loaded (setupRSSKB) and after the case (peakRSSKB)
+    '''
+    os.makedirs(directory, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for family in families:
+        for size in sizes:
+            name = "%s-%d-%d" % (family, size, seed)
+            filename = os.path.join(directory, name + ".txt")
+            if not os.path.exists(filename):
+                generators.generate(family, size, filename, seed)
+            position = 0
+            while True:
+                with context.Pool(1) as pool:
+                    result = pool.apply(_runCase, (filename, position, repeat))
+                if result is None:
+                    break
+                position += 1
+                case, items, times, setupRSS, caseRSS = result
+                p50 = percentile(times, 50)
+                results.append({"graph": name, "family": family, "edges": size, "case": case, "repeat": repeat,
+                                "min": times[0], "p50": p50,
+                                "p90": percentile(times, 90) if repeat >= 10 else None,
+                                "p99": percentile(times, 99) if repeat >= 100 else None,
+                                "max": times[-1], "mean": sum(times) / repeat,
+                                "throughput": items / p50 if p50 > 0 else None,
+                                "setupRSSKB": setupRSS, "peakRSSKB": caseRSS})
+                print("%-24s %-20s p50 %.4fs" % (name, case, p50))
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+
+
+def compareBaseline(report, baseline, threshold=1.25):
+    '''
+    Compares the medians of a suite report against a stored baseline report
+    :return: the list of (graph, case, baseline p50, new p50) that got slower than threshold times the baseline
+    '''
+    old = {(r["graph"], r["case"]): r["p50"] for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        before = old.get((r["graph"], r["case"]))
+        if before is not None and r["p50"] > threshold * before:
+            regressions.append((r["graph"], r["case"], before, r["p50"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph benchmarks. Without --suite the quick comparisons are run.")
+    parser.add_argument("--suite", action="store_true", help="run the benchmark suite on generated graphs")
+    parser.add_argument("--families", default=",".join(FAMILIES), help="comma separated: er,rmat,grid,dag")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma separated edge counts")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="runs of every case, p90 needs at least 10 and p99 at least 100")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dir", default="benchmarkGraphs", help="where generated graphs are kept")
+    parser.add_argument("--out", help="write the report to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON report and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    parser.add_argument("--frontier-bfs", type=int, metavar="EDGES",
+                        help="only compare BFS and frontierBFS on a generated R-MAT graph with this many edges")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes for --frontier-bfs")
+    parser.add_argument("--dense", type=int, metavar="VERTICES",
+                        help="only compare FloydWarshall and BellmanFord on a generated dense graph of this many vertices")
+    args = parser.parse_args()
+
+    if args.frontier_bfs:
+        benchmarkFrontierBFS(args.frontier_bfs, "rmat", args.dir, args.seed, processes=args.processes)
+        return
+
+    if args.dense:
+        benchmarkAllPairsDense(args.dense, directory=args.dir, seed=args.seed)
+        return
+
+    if not args.suite:
+        benchmarkLoad()
+        benchmarkCSR()
+        benchmarkShortestPaths()
+        benchmarkAllPairs()
+        benchmarkAllPairsDense()
+        benchmarkMutations()
+        benchmarkBackends()
+        return
+
+    report = runSuite(args.families.split(","), [int(size) for size in args.sizes.split(",")],
+                      args.repeat, args.dir, args.seed)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compareBaseline(report, json.load(f), args.threshold)
+        for graphName, case, before, after in regressions:
+            print("REGRESSION %s %s: %.4fs -> %.4fs" % (graphName, case, before, after))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import heapq
+import math
+import multiprocessing
+import random
+from array import array
+from collections import deque
+from operator import mul, sub
+
+import instrumentation
+
+
+class TransitionMatrix:
+    '''
+    Sparse transition matrix of the random walk on a graph, built once and reused by pageRank
+    Stored by rows in compact arrays, like CSRGraph: the positions of the vertices with an edge into vertex
+    position i are sources[offsets[i]:offsets[i + 1]] and, in the weighted mode, the probabilities of moving
+    along these edges are the same slice of weights
+    Vertices with no outbound edge (or no outbound weight) are dangling: the walk jumps anywhere from them
+    '''
+
+    def __init__(self, G, weighted=False):
+        '''
+        :param G: the graph, any backend of the common protocol
+        :param weighted: if True a walk leaves a vertex along an edge with a probability proportional to its cost
+            (costs must be non-negative), otherwise every outbound edge is equally likely
+        Raises ValueError for a negative cost in the weighted mode
+        '''
+        self.vertices = list(G.getVertices())
+        index = {v: i for i, v in enumerate(self.vertices)}
+        self.weighted = weighted
+        costs = G.getCosts()
+        # the total outbound weight of every vertex, 0 for the dangling ones
+        if weighted:
+            self.outWeight = array('d', bytes(8 * len(index)))
+            for (x, y), c in costs.items():
+                if c < 0:
+                    raise ValueError("negative cost on edge " + str((x, y)))
+                self.outWeight[index[x]] += c
+        else:
+            self.outWeight = array('q', map(G.getOutDegree, self.vertices))
+        self.dangling = array('i', (i for i, w in enumerate(self.outWeight) if w == 0))
+        self.offsets = array('q', [0])
+        self.sources = array('i')
+        self.weights = array('d') if weighted else None
+        for v in self.vertices:
+            row = [index[u] for u in G.getInbound(v)]
+            self.sources.extend(row)
+            self.offsets.append(len(self.sources))
+            if weighted:
+                outWeight = self.outWeight
+                self.weights.extend(costs[(u, v)] / outWeight[i] if outWeight[i] else 0
+                                    for u, i in zip(G.getInbound(v), row))
+
+    def getEdgesNumber(self):
+        return len(self.sources)
+
+
+def pageRank(G, damping=0.85, tolerance=1e-10, maxIterations=100, weighted=False, matrix=None):
+    '''
+    PageRank by power iteration: the rank of every vertex is the probability of finding there a walk that
+    follows a random outbound edge with probability damping and jumps to a random vertex otherwise
+    (always from a dangling vertex)
+    :param G: the graph, not read if matrix is given
+    :param damping: the probability of following an edge
+    :param tolerance: the iteration stops when the ranks change by less than this in total (L1 norm)
+    :param maxIterations: the iteration stops after this many rounds in any case
+    :param weighted: see TransitionMatrix
+    :param matrix: a TransitionMatrix of G, built if not given; building it is the most expensive part,
+        so it is worth keeping when the ranks are computed several times
+    :return: a dictionary vertex -> rank, the ranks adding up to 1
+    '''
+    if matrix is None:
+        with instrumentation.phase("transitionMatrix"):
+            matrix = TransitionMatrix(G, weighted)
+    n = len(matrix.vertices)
+    if n == 0:
+        return {}
+    rank = [1 / n] * n
+    outWeight = matrix.outWeight
+    offsets = matrix.offsets
+    sources = matrix.sources
+    weights = matrix.weights
+    iterations = 0
+    with instrumentation.phase("powerIteration"):
+        for iterations in range(1, maxIterations + 1):
+            danglingMass = sum(map(rank.__getitem__, matrix.dangling))
+            base = (1 - damping + damping * danglingMass) / n
+            if weights is None:
+                # the share of its rank every vertex sends along each of its edges
+                share = [r / w if w else 0 for r, w in zip(rank, outWeight)]
+                new = [base + damping * sum(map(share.__getitem__, sources[i:j])) for i, j in zip(offsets, offsets[1:])]
+            else:
+                new = [base + damping * sum(map(mul, map(rank.__getitem__, sources[i:j]), weights[i:j]))
+                       for i, j in zip(offsets, offsets[1:])]
+            change = sum(map(abs, map(sub, new, rank)))
+            rank = new
+            if change < tolerance:
+                break
+    instrumentation.count("iterations", iterations)
+    instrumentation.count("edgeScans", iterations * matrix.getEdgesNumber())
+    return dict(zip(matrix.vertices, rank))
+
+
+def degreeCentrality(G, normalized=True):
+    '''
+    In-degree and out-degree centrality
+    :param normalized: if True the degrees are divided by n - 1, the highest possible degree without loops
+    :return: two dictionaries vertex -> centrality, for the in-degree and the out-degree
+    '''
+    n = G.getVerticesNumber()
+    scale = 1 / (n - 1) if normalized and n > 1 else 1
+    return ({v: G.getInDegree(v) * scale for v in G.getVertices()},
+            {v: G.getOutDegree(v) * scale for v in G.getVertices()})
+
+
+# state of a worker process, set once by _initWorker so the graph is not sent again with every source
+_graph = None
+_weighted = False
+
+
+def _initWorker(graph, weighted):
+    global _graph, _weighted
+    _graph = graph
+    _weighted = weighted
+
+
+def _brandes(sources):
+    '''
+    Brandes' dependency accumulation from every given source, in the current process
+    :return: a dictionary vertex -> the sum of the dependencies of the sources on it
+    '''
+    G = _graph
+    costs = G.getCosts() if _weighted else None
+    total = {}
+    for s in sources:
+        # vertices in order of distance, number of shortest paths and predecessors on them
+        order = []
+        paths = {s: 1}
+        predecessors = {s: []}
+        dist = {s: 0}
+        if costs is None:
+            queue = deque([s])
+            while queue:
+                x = queue.popleft()
+                order.append(x)
+                d = dist[x] + 1
+                for y in G.getOutbound(x):
+                    if y not in dist:
+                        dist[y] = d
+                        paths[y] = 0
+                        predecessors[y] = []
+                        queue.append(y)
+                    if dist[y] == d:
+                        paths[y] += paths[x]
+                        predecessors[y].append(x)
+        else:
+            # Dijkstra, counting the paths when a vertex is reached again at the same cost
+            heap = [(0, s)]
+            done = set()
+            while heap:
+                d, x = heapq.heappop(heap)
+                if x in done:
+                    continue
+                done.add(x)
+                order.append(x)
+                for y in G.getOutbound(x):
+                    if y in done:
+                        continue
+                    cost = d + costs[(x, y)]
+                    if cost < dist.get(y, math.inf):
+                        dist[y] = cost
+                        paths[y] = paths[x]
+                        predecessors[y] = [x]
+                        heapq.heappush(heap, (cost, y))
+                    elif cost == dist[y]:
+                        paths[y] += paths[x]
+                        predecessors[y].append(x)
+
+        dependency = dict.fromkeys(order, 0)
+        for w in reversed(order):
+            coefficient = (1 + dependency[w]) / paths[w]
+            for v in predecessors[w]:
+                dependency[v] += paths[v] * coefficient
+            if w != s:
+                total[w] = total.get(w, 0) + dependency[w]
+    return total
+
+
+def betweenness(G, samples=None, seed=0, weighted=False, normalized=True, processes=1, chunksize=16):
+    '''
+    Betweenness centrality with Brandes' algorithm: for every vertex, the share of the shortest paths between
+    other vertices that go through it. With samples, only that many random sources are used and the result
+    is scaled up, which estimates the exact values in a fraction of the time
+    :param G: a directed graph
+    :param samples: the number of sources, all the vertices if None
+    :param seed: the seed used to pick the sources
+    :param weighted: if True the paths are lowest cost ones (costs must be positive), otherwise fewest edges
+    :param normalized: if True the values are divided by (n - 1)(n - 2), the number of ordered pairs of other vertices
+    :param processes: the number of worker processes sharing the sources, 1 for none, None for os.cpu_count()
+    :param chunksize: the number of sources sent to a worker at a time
+    :return: a dictionary vertex -> betweenness
+    '''
+    vertices = list(G.getVertices())
+    n = len(vertices)
+    sources = vertices
+    if samples is not None and samples < n:
+        sources = random.Random(seed).sample(vertices, samples)
+    chunks = [sources[i:i + chunksize] for i in range(0, len(sources), chunksize)]
+
+    result = dict.fromkeys(vertices, 0)
+    if processes == 1:
+        _initWorker(G, weighted)
+        partials = map(_brandes, chunks)
+        pool = None
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        pool = context.Pool(processes, initializer=_initWorker, initargs=(G, weighted))
+        partials = pool.imap_unordered(_brandes, chunks)
+    try:
+        for partial in partials:
+            for v, value in partial.items():
+                result[v] += value
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    scale = n / len(sources) if sources else 0
+    if normalized and n > 2:
+        scale /= (n - 1) * (n - 2)
+    return {v: value * scale for v, value in result.items()}
@@ -0,0 +1,261 @@
+from bisect import bisect_left
+
+from graphProtocol import CostView, VerticesView
+
+
+class ChangeLog:
+    '''
+    Records every change made to a DirectedGraph (see DirectedGraph.addListener) so that earlier
+    versions of the graph can be looked at, compared, replayed or rolled back without copying it
+    Version k is the graph after the first k recorded changes; version 0 is the graph when the log started.
+    Memory grows with the number of changes, not with the size of the graph
+    '''
+
+    def __init__(self, G):
+        self.__graph = G
+        # (change, x, y, oldCost, newCost), in the order they happened
+        self.__entries = []
+        # indices of the entries touching an edge / a vertex / the edges leaving or entering a vertex
+        self.__edgeHistory = {}
+        self.__vertexHistory = {}
+        self.__outHistory = {}
+        self.__inHistory = {}
+        G.addListener(self.__record)
+
+    def __record(self, change, x, y, oldCost, newCost):
+        index = len(self.__entries)
+        self.__entries.append((change, x, y, oldCost, newCost))
+        if change in ("addVertex", "removeVertex"):
+            self.__vertexHistory.setdefault(x, []).append(index)
+        else:
+            self.__edgeHistory.setdefault((x, y), []).append(index)
+            self.__outHistory.setdefault(x, []).append(index)
+            self.__inHistory.setdefault(y, []).append(index)
+
+    def close(self):
+        '''
+        Stops recording changes
+        '''
+        self.__graph.removeListener(self.__record)
+
+    def getGraph(self):
+        return self.__graph
+
+    def version(self):
+        '''
+        Returns the current version, that is the number of changes recorded so far
+        '''
+        return len(self.__entries)
+
+    def snapshot(self, version=None):
+        '''
+        Returns a read-only view of the graph as it was at the given version (the current one if None), in O(1)
+        '''
+        if version is None:
+            version = self.version()
+        if not 0 <= version <= self.version():
+            raise ValueError("unknown version " + str(version))
+        return GraphSnapshot(self, version)
+
+    def changes(self, since=0, until=None):
+        '''
+        Returns the changes that lead from version since to version until (the current one if None),
+        as a list of (change, x, y, oldCost, newCost) in the order they happened
+        '''
+        return self.__entries[since:until]
+
+    def edgeAt(self, x, y, version):
+        '''
+        Returns the cost of the edge (x, y) at the given version, None if the edge did not exist
+        '''
+        history = self.__edgeHistory.get((x, y))
+        if history:
+            i = bisect_left(history, version)
+            if i < len(history):
+                return self.__entries[history[i]][3]
+        G = self.__graph
+        if G.vertexExists(x) and G.edgeExists(x, y):
+            return G.getCost(x, y)
+        return None
+
+    def vertexAt(self, v, version):
+        '''
+        Returns True if v was a vertex of the graph at the given version
+        '''
+        history = self.__vertexHistory.get(v)
+        if history:
+            i = bisect_left(history, version)
+            if i < len(history):
+                return self.__entries[history[i]][0] == "removeVertex"
+        return self.__graph.vertexExists(v)
+
+    def verticesAt(self, version):
+        '''
+        Returns the list of vertices of the graph at the given version
+        '''
+        changed = [v for v, history in self.__vertexHistory.items() if history[-1] >= version]
+        changedSet = set(changed)
+        result = [v for v in self.__graph.getVertices() if v not in changedSet]
+        result.extend(v for v in changed if self.vertexAt(v, version))
+        return result
+
+    def neighboursAt(self, v, version, outbound=True):
+        '''
+        Returns the outbound (or inbound) neighbours of v at the given version, None if v was not a vertex
+        '''
+        if not self.vertexAt(v, version):
+            return None
+        G = self.__graph
+        history = (self.__outHistory if outbound else self.__inHistory).get(v, [])
+        touched = {}
+        for index in history[bisect_left(history, version):]:
+            change, x, y = self.__entries[index][:3]
+            touched[y if outbound else x] = None
+        live = ()
+        if G.vertexExists(v):
+            live = G.getOutbound(v) if outbound else G.getInbound(v)
+        result = [u for u in live if u not in touched]
+        for u in touched:
+            edge = (v, u) if outbound else (u, v)
+            if self.edgeAt(edge[0], edge[1], version) is not None:
+                result.append(u)
+        return result
+
+    def diff(self, a, b=None):
+        '''
+        Returns the net changes between versions a and b (the current one if None) as a list of
+        (change, x, y, oldCost, newCost): vertices added or removed and edges added, removed or with a new cost
+        Changes that cancel out, like an edge added and then removed, are left out
+        '''
+        if b is None:
+            b = self.version()
+        edges = {}
+        vertices = {}
+        for change, x, y, oldCost, newCost in self.__entries[min(a, b):max(a, b)]:
+            if change in ("addVertex", "removeVertex"):
+                vertices[x] = None
+            else:
+                edges[(x, y)] = None
+        # new vertices come first and removed ones last, so the result can be replayed in order
+        result = []
+        removed = []
+        for v in vertices:
+            before = self.vertexAt(v, a)
+            after = self.vertexAt(v, b)
+            if after and not before:
+                result.append(("addVertex", v, None, None, None))
+            elif before and not after:
+                removed.append(("removeVertex", v, None, None, None))
+        for x, y in edges:
+            before = self.edgeAt(x, y, a)
+            after = self.edgeAt(x, y, b)
+            if before == after:
+                continue
+            if before is None:
+                result.append(("addEdge", x, y, None, after))
+            elif after is None:
+                result.append(("removeEdge", x, y, before, None))
+            else:
+                result.append(("setCost", x, y, before, after))
+        result.extend(removed)
+        return result
+
+    def rollback(self, version):
+        '''
+        Brings the graph back to the given version by undoing the later changes, newest first
+        The undo operations are recorded like any other change, so the history is never lost
+        '''
+        for change, x, y, oldCost, newCost in reversed(self.__entries[version:]):
+            inverse = {"addEdge": "removeEdge", "removeEdge": "addEdge", "setCost": "setCost",
+                       "addVertex": "removeVertex", "removeVertex": "addVertex"}[change]
+            replay([(inverse, x, y, newCost, oldCost)], self.__graph)
+
+
+def replay(changes, G):
+    '''
+    Applies a batch of changes, as returned by ChangeLog.changes or ChangeLog.diff, to a DirectedGraph
+    '''
+    for change, x, y, oldCost, newCost in changes:
+        if change == "addVertex":
+            G.addVertex(x)
+        elif change == "removeVertex":
+            G.removeVertex(x)
+        elif change == "addEdge":
+            G.addEdge(x, y, newCost)
+        elif change == "removeEdge":
+            G.removeEdge(x, y)
+        elif change == "setCost":
+            G.setCost(x, y, newCost)
+
+
+class GraphSnapshot:
+    '''
+    Read-only view of a DirectedGraph at a given version of its ChangeLog
+    Nothing is copied: queries look at the live graph and undo the changes made after the version,
+    so they cost O(degree + changes since the version)
+    Exposes the read-only part of the DirectedGraph interface, so the algorithms in graphAlgorithms run on it
+    '''
+
+    def __init__(self, log, version):
+        self.__log = log
+        self.__version = version
+        self.__vertices = None
+
+    def getVersion(self):
+        return self.__version
+
+    def vertices(self):
+        '''
+        Returns the list of vertices, computed once: a version never changes
+        '''
+        if self.__vertices is None:
+            self.__vertices = self.__log.verticesAt(self.__version)
+        return self.__vertices
+
+    def vertexExists(self, v):
+        return self.__log.vertexAt(v, self.__version)
+
+    def edgeExists(self, x, y):
+        return self.__log.edgeAt(x, y, self.__version) is not None
+
+    def getCost(self, x, y):
+        return self.__log.edgeAt(x, y, self.__version)
+
+    def getCosts(self):
+        return CostView(self)
+
+    def edges(self):
+        for x in self.vertices():
+            for y in self.getOutbound(x):
+                yield x, y
+
+    def getEdgesNumber(self):
+        return sum(len(self.getOutbound(x)) for x in self.vertices())
+
+    def getOutbound(self, v):
+        return self.__log.neighboursAt(v, self.__version, True)
+
+    def getInbound(self, v):
+        return self.__log.neighboursAt(v, self.__version, False)
+
+    def getInDegree(self, v):
+        neighbours = self.getInbound(v)
+        if neighbours is not None:
+            return len(neighbours)
+
+    def getOutDegree(self, v):
+        neighbours = self.getOutbound(v)
+        if neighbours is not None:
+            return len(neighbours)
+
+    def getVertices(self):
+        return VerticesView(self)
+
+    def getVerticesNumber(self):
+        return len(self.vertices())
+
+    def diff(self, other):
+        '''
+        Returns the net changes leading from this snapshot to another snapshot of the same graph, see ChangeLog.diff
+        '''
+        return self.__log.diff(self.__version, other.getVersion())
@@ -0,0 +1,168 @@
+from array import array
+
+import instrumentation
+import traversal
+from graph import DirectedGraph
+
+
+class _Ids(dict):
+    '''
+    Component ids for graphs with arbitrary vertices, read and written like an array; -1 means no id yet
+    '''
+
+    def __missing__(self, v):
+        return -1
+
+
+def newIds(G):
+    '''
+    Returns an empty vertex -> int store for the vertices of G: a compact array('i') filled with -1
+    when the vertices are the integers 0..n-1, a dictionary answering -1 for unknown vertices otherwise
+    '''
+    n = G.getVerticesNumber()
+    if all(type(v) is int and 0 <= v < n for v in G.getVertices()):
+        return array('i', [-1]) * n
+    return _Ids()
+
+
+def _items(ids):
+    if isinstance(ids, array):
+        return enumerate(ids)
+    return ids.items()
+
+
+def tarjan(G):
+    '''
+    Tarjan's strongly connected components algorithm with an explicit stack, so that long chains
+    do not hit the recursion limit; O(V + E)
+    :param G: a directed graph
+    :return: the number of components k and the component id (0..k-1) of every vertex, see newIds;
+        the ids follow a topological order of the condensation: every edge between two components
+        goes from a lower id to a higher one
+    '''
+    index = newIds(G)
+    low = newIds(G)
+    component = newIds(G)
+    onStack = traversal.newMarks(G)
+    stack = []
+    counter = 0
+    count = 0
+    for root in G.getVertices():
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        onStack[root] = 1
+        work = [(root, iter(G.getOutbound(root)))]
+        while work:
+            x, neighbours = work[-1]
+            for y in neighbours:
+                if index[y] == -1:
+                    index[y] = low[y] = counter
+                    counter += 1
+                    stack.append(y)
+                    onStack[y] = 1
+                    work.append((y, iter(G.getOutbound(y))))
+                    break
+                if onStack[y] and index[y] < low[x]:
+                    low[x] = index[y]
+            else:
+                work.pop()
+                if work and low[x] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[x]
+                if low[x] == index[x]:
+                    while True:
+                        v = stack.pop()
+                        onStack[v] = 0
+                        component[v] = count
+                        if v == x:
+                            break
+                    count += 1
+
+    # Tarjan closes the components in reverse topological order
+    for v, c in list(_items(component)):
+        component[v] = count - 1 - c
+    instrumentation.count("vertexVisits", counter)
+    return count, component
+
+
+def kosaraju(G):
+    '''
+    Kosaraju's strongly connected components algorithm: a depth-first search of G gives the finishing order,
+    then the vertices are taken in reverse finishing order and every one not yet placed collects
+    the vertices that reach it; O(V + E), uses getInbound instead of building the transposed graph
+    :param G: a directed graph
+    :return: the number of components and the component id of every vertex, like tarjan
+    '''
+    order = [v for event, v, depth, parent in traversal.dfsEvents(G) if event == traversal.FINISH]
+    component = newIds(G)
+    count = 0
+    for root in reversed(order):
+        if component[root] != -1:
+            continue
+        component[root] = count
+        stack = [root]
+        while stack:
+            x = stack.pop()
+            for y in G.getInbound(x):
+                if component[y] == -1:
+                    component[y] = count
+                    stack.append(y)
+        count += 1
+    instrumentation.count("vertexVisits", 2 * len(order))
+    return count, component
+
+
+def stronglyConnectedComponents(G, algorithm="tarjan"):
+    '''
+    Splits a directed graph into its strongly connected components
+    :param G: a directed graph
+    :param algorithm: "tarjan" or "kosaraju", both give the same components and a topological order of them
+    :return: the number of components and the component id of every vertex, see tarjan
+    Raises ValueError for an unknown algorithm
+    '''
+    if algorithm == "tarjan":
+        return tarjan(G)
+    if algorithm == "kosaraju":
+        return kosaraju(G)
+    raise ValueError("unknown algorithm " + str(algorithm))
+
+
+def componentMembers(count, component):
+    '''
+    Returns the list of the vertices of every component, indexed by component id
+    '''
+    members = [[] for _ in range(count)]
+    for v, c in _items(component):
+        if c != -1:
+            members[c].append(v)
+    return members
+
+
+def condensation(G, count=None, component=None, combine=min):
+    '''
+    Builds the condensation of G: one vertex per strongly connected component and an edge between
+    two components whenever an edge of G links them; the result is a DAG whose vertices 0..k-1 are
+    already in topological order
+    :param G: a directed graph
+    :param count: the number of components, computed with tarjan together with component if not given
+    :param component: the component id of every vertex
+    :param combine: the function giving the cost of a condensed edge from the list of costs
+        of the edges it stands for, min for lowest cost paths, max for highest cost ones
+    :return: the condensed graph as a DirectedGraph
+    '''
+    if component is None:
+        count, component = tarjan(G)
+    costs = {}
+    for (x, y), c in G.getCosts().items():
+        cx = component[x]
+        cy = component[y]
+        if cx != cy:
+            costs.setdefault((cx, cy), []).append(c)
+    result = DirectedGraph(None)
+    for v in range(count):
+        result.addVertex(v)
+    for (x, y), c in costs.items():
+        result.addEdge(x, y, combine(c))
+    return result
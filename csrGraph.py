@@ -0,0 +1,294 @@
+import mmap as mmapModule
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+import instrumentation
+from graph import readEdgeList
+from graphProtocol import CostView, VerticesView
+
+SNAPSHOT_MAGIC = b"CSRGRAPH"
+SNAPSHOT_VERSION = 1
+# magic, version, little endian flag, number of vertices, number of edges
+_SNAPSHOT_HEADER = struct.Struct("<8sIIqq")
+
+
+def _toArray(buffer):
+    '''
+    Returns the contents of an array or memoryview buffer as an array
+    '''
+    if isinstance(buffer, array):
+        return buffer
+    result = array(buffer.format)
+    result.frombytes(buffer.cast('B'))
+    return result
+
+
+class CSRGraph:
+    '''
+    Immutable, array-backed directed graph (compressed sparse row for the outbound
+    side, compressed sparse column for the inbound side).
+    Vertices are the integers 0..n-1. The neighbours of every vertex are kept sorted,
+    so edge lookups are a binary search inside the row.
+    Exposes the read-only part of the DirectedGraph interface, so the algorithms in
+    graphAlgorithms run on it unchanged.
+    '''
+
+    def __init__(self, n, outOffsets, outTargets, outCosts, inOffsets, inSources, inCosts):
+        '''
+        Wraps already built buffers (array.array or memoryview), nothing is copied
+        :param n: number of vertices
+        :param outOffsets: n + 1 offsets into outTargets/outCosts
+        :param outTargets: targets of the edges, grouped by source
+        :param outCosts: costs of the edges, parallel to outTargets
+        :param inOffsets: n + 1 offsets into inSources/inCosts
+        :param inSources: sources of the edges, grouped by target
+        :param inCosts: costs of the edges, parallel to inSources
+        '''
+        self.__n = n
+        self.__outOffsets = outOffsets
+        self.__outTargets = memoryview(outTargets)
+        self.__outCosts = memoryview(outCosts)
+        self.__inOffsets = inOffsets
+        self.__inSources = memoryview(inSources)
+        self.__inCosts = memoryview(inCosts)
+
+    def __reduce__(self):
+        # memoryviews can't be pickled, the buffers travel as arrays instead
+        return CSRGraph, (self.__n, _toArray(self.__outOffsets), _toArray(self.__outTargets),
+                          _toArray(self.__outCosts), _toArray(self.__inOffsets), _toArray(self.__inSources),
+                          _toArray(self.__inCosts))
+
+    @classmethod
+    def fromEdges(cls, n, xs, ys, costs):
+        '''
+        Builds the graph from parallel sequences of edge sources, targets and costs
+        Duplicated edges keep the first cost, like DirectedGraph.addEdge
+        :param n: number of vertices, every endpoint must be in 0..n-1
+        :return: a CSRGraph
+        '''
+        keys = [x * n + y for x, y in zip(xs, ys)]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        del keys
+
+        outOffsets = array('q', bytes(8 * (n + 1)))
+        outTargets = array('i')
+        outCosts = array('q')
+        lastX = lastY = -1
+        for i in order:
+            x = xs[i]
+            y = ys[i]
+            if x == lastX and y == lastY:
+                continue
+            lastX, lastY = x, y
+            outOffsets[x + 1] += 1
+            outTargets.append(y)
+            outCosts.append(costs[i])
+        for v in range(n):
+            outOffsets[v + 1] += outOffsets[v]
+
+        inOffsets = array('q', bytes(8 * (n + 1)))
+        for y in outTargets:
+            inOffsets[y + 1] += 1
+        for v in range(n):
+            inOffsets[v + 1] += inOffsets[v]
+        m = len(outTargets)
+        inSources = array('i', bytes(4 * m))
+        inCosts = array('q', bytes(8 * m))
+        fill = array('q', inOffsets[:n])
+        # sources are visited in increasing order, so every inbound row comes out sorted
+        for x in range(n):
+            for i in range(outOffsets[x], outOffsets[x + 1]):
+                y = outTargets[i]
+                pos = fill[y]
+                inSources[pos] = x
+                inCosts[pos] = outCosts[i]
+                fill[y] = pos + 1
+
+        return cls(n, outOffsets, outTargets, outCosts, inOffsets, inSources, inCosts)
+
+    @classmethod
+    def fromFile(cls, filename):
+        '''
+        Builds the graph straight from a "n m / x y c" edge list file, without going through DirectedGraph
+        '''
+        with instrumentation.phase("load"):
+            n, xs, ys, costs = readEdgeList(filename)
+            return cls.fromEdges(n, xs, ys, costs)
+
+    @classmethod
+    def fromDirectedGraph(cls, g):
+        '''
+        Builds a CSRGraph with the same vertices, edges and costs as a DirectedGraph
+        The vertices of g must be the integers 0..n-1
+        '''
+        xs = array('i')
+        ys = array('i')
+        costs = array('q')
+        for (x, y), c in g.getCosts().items():
+            xs.append(x)
+            ys.append(y)
+            costs.append(c)
+        return cls.fromEdges(g.getVerticesNumber(), xs, ys, costs)
+
+    def vertices(self):
+        return range(self.__n)
+
+    def vertexExists(self, v):
+        return type(v) is int and 0 <= v < self.__n
+
+    def edgeExists(self, x, y):
+        return self.__find(x, y) >= 0
+
+    def __find(self, x, y):
+        '''
+        Returns the position of the edge (x, y) in the outbound arrays, -1 if it does not exist
+        '''
+        if not self.vertexExists(x):
+            return -1
+        hi = self.__outOffsets[x + 1]
+        pos = bisect_left(self.__outTargets, y, self.__outOffsets[x], hi)
+        if pos < hi and self.__outTargets[pos] == y:
+            return pos
+        return -1
+
+    def getInbound(self, v):
+        if self.vertexExists(v):
+            return self.__inSources[self.__inOffsets[v]:self.__inOffsets[v + 1]]
+
+    def getOutbound(self, v):
+        if self.vertexExists(v):
+            return self.__outTargets[self.__outOffsets[v]:self.__outOffsets[v + 1]]
+
+    def getInboundCosts(self, v):
+        '''
+        Returns the costs of the inbound edges of v, parallel to getInbound(v)
+        '''
+        if self.vertexExists(v):
+            return self.__inCosts[self.__inOffsets[v]:self.__inOffsets[v + 1]]
+
+    def getOutboundCosts(self, v):
+        '''
+        Returns the costs of the outbound edges of v, parallel to getOutbound(v)
+        '''
+        if self.vertexExists(v):
+            return self.__outCosts[self.__outOffsets[v]:self.__outOffsets[v + 1]]
+
+    def getCost(self, x, y):
+        pos = self.__find(x, y)
+        if pos >= 0:
+            return self.__outCosts[pos]
+
+    def getCosts(self):
+        '''
+        Returns a read-only mapping (x, y) -> cost over all the edges
+        '''
+        return CostView(self)
+
+    def edges(self):
+        '''
+        Returns an iterator over all the edges as (x, y) tuples, grouped by source
+        '''
+        offsets = self.__outOffsets
+        targets = self.__outTargets
+        for x in range(self.__n):
+            for i in range(offsets[x], offsets[x + 1]):
+                yield x, targets[i]
+
+    def getVerticesNumber(self):
+        return self.__n
+
+    def getEdgesNumber(self):
+        return len(self.__outTargets)
+
+    def getInDegree(self, v):
+        if self.vertexExists(v):
+            return self.__inOffsets[v + 1] - self.__inOffsets[v]
+
+    def getOutDegree(self, v):
+        if self.vertexExists(v):
+            return self.__outOffsets[v + 1] - self.__outOffsets[v]
+
+    def getVertices(self):
+        '''
+        Returns a read-only mapping vertex -> outbound neighbours
+        '''
+        return VerticesView(self)
+
+    def copy(self):
+        '''
+        The graph is immutable, so a copy is the graph itself
+        '''
+        return self
+
+    def save(self, path):
+        '''
+        Writes the graph to a binary snapshot file that load() can map back into memory
+        The file holds a fixed header followed by the raw buffers, every one of them aligned to its item size:
+        out offsets, in offsets, out costs, in costs (64 bit) and out targets, in sources (32 bit)
+        :param path: the file to be written
+        '''
+        n = self.__n
+        m = self.getEdgesNumber()
+        with open(path, "wb") as f:
+            f.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, sys.byteorder == "little", n, m))
+            for buffer in (self.__outOffsets, self.__inOffsets, self.__outCosts,
+                           self.__inCosts, self.__outTargets, self.__inSources):
+                f.write(buffer)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        '''
+        Reads a snapshot written by save()
+        :param path: the snapshot file
+        :param mmap: if True the buffers are mapped straight from the file without being copied, so processes
+            loading the same snapshot share the page cache; otherwise they are read into memory
+        :return: a CSRGraph
+        Raises ValueError if the file is not a snapshot this version can read
+        '''
+        with open(path, "rb") as f:
+            if mmap:
+                data = memoryview(mmapModule.mmap(f.fileno(), 0, access=mmapModule.ACCESS_READ))
+            else:
+                data = memoryview(f.read())
+        if len(data) < _SNAPSHOT_HEADER.size:
+            raise ValueError("not a graph snapshot: " + str(path))
+        magic, version, little, n, m = _SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a graph snapshot: " + str(path))
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("unsupported graph snapshot version " + str(version))
+        if bool(little) != (sys.byteorder == "little"):
+            raise ValueError("graph snapshot was written on a machine with a different byte order")
+
+        buffers = []
+        position = _SNAPSHOT_HEADER.size
+        for count, typecode, size in ((n + 1, 'q', 8), (n + 1, 'q', 8), (m, 'q', 8),
+                                      (m, 'q', 8), (m, 'i', 4), (m, 'i', 4)):
+            end = position + count * size
+            if end > len(data):
+                raise ValueError("truncated graph snapshot: " + str(path))
+            if mmap:
+                buffers.append(data[position:end].cast(typecode))
+            else:
+                buffer = array(typecode)
+                buffer.frombytes(data[position:end])
+                buffers.append(buffer)
+            position = end
+        outOffsets, inOffsets, outCosts, inCosts, outTargets, inSources = buffers
+        return cls(n, outOffsets, outTargets, outCosts, inOffsets, inSources, inCosts)
+
+
+def convertEdgeList(filename, path):
+    '''
+    Converts a "n m / x y c" edge list file (like 1k.txt or 10k.txt) to a binary snapshot
+    '''
+    CSRGraph.fromFile(filename).save(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python csrGraph.py <edge list file> <snapshot file>")
+        sys.exit(1)
+    convertEdgeList(sys.argv[1], sys.argv[2])
@@ -0,0 +1,140 @@
+import heapq
+import math
+
+
+class DynamicShortestPaths:
+    '''
+    Single source lowest cost paths kept up to date while a DirectedGraph changes
+    The object listens to the graph (see DirectedGraph.addListener) and after every change repairs
+    only the part of the shortest path tree it affects:
+        - a cheaper or new edge re-relaxes from its target, stopping where distances don't improve
+        - a more expensive or removed tree edge invalidates the subtree under it, which is then
+          rebuilt from the unaffected vertices around it (Ramalingam-Reps)
+        - changes to edges outside the tree that don't make them cheaper need no work
+    All the costs must be non-negative
+    '''
+
+    def __init__(self, G, s):
+        '''
+        Computes the initial tree and starts listening to G
+        :param G: a DirectedGraph
+        :param s: the starting vertex
+        '''
+        self.__graph = G
+        self.__source = s
+        self.__dist = {s: 0}
+        self.__parent = {s: None}
+        self.__children = {s: set()}
+        self.__relax([(0, s)])
+        G.addListener(self.__onChange)
+
+    def close(self):
+        '''
+        Stops listening to the graph
+        '''
+        self.__graph.removeListener(self.__onChange)
+
+    def distance(self, t):
+        '''
+        Returns the lowest cost from the source to t, math.inf if t can't be reached
+        '''
+        return self.__dist.get(t, math.inf)
+
+    def path(self, t):
+        '''
+        Returns the lowest cost path from the source to t as a list of vertices, None if t can't be reached
+        Runs in O(path length)
+        '''
+        if t not in self.__dist:
+            return None
+        path = []
+        current = t
+        while current is not None:
+            path.append(current)
+            current = self.__parent[current]
+        path.reverse()
+        return path
+
+    def __setParent(self, v, p):
+        old = self.__parent.get(v)
+        if old is not None:
+            self.__children[old].discard(v)
+        self.__parent[v] = p
+        self.__children.setdefault(v, set())
+        if p is not None:
+            self.__children[p].add(v)
+
+    def __relax(self, heap):
+        '''
+        Dijkstra from the (distance, vertex) entries of heap, only going on where distances improve
+        '''
+        G = self.__graph
+        costs = G.getCosts()
+        dist = self.__dist
+        heapq.heapify(heap)
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist.get(x, math.inf):
+                continue
+            for y in G.getOutbound(x):
+                nd = d + costs[(x, y)]
+                if nd < dist.get(y, math.inf):
+                    dist[y] = nd
+                    self.__setParent(y, x)
+                    heapq.heappush(heap, (nd, y))
+
+    def __edgeCheaper(self, x, y, cost):
+        if x in self.__dist and self.__dist[x] + cost < self.__dist.get(y, math.inf):
+            self.__dist[y] = self.__dist[x] + cost
+            self.__setParent(y, x)
+            self.__relax([(self.__dist[y], y)])
+
+    def __treeEdgeWorse(self, y):
+        '''
+        The edge into y from its parent got more expensive or was removed: every vertex under y
+        loses its distance and gets the best one offered by the vertices outside the subtree
+        '''
+        affected = []
+        stack = [y]
+        while stack:
+            v = stack.pop()
+            affected.append(v)
+            stack.extend(self.__children[v])
+        affectedSet = set(affected)
+        for v in affected:
+            del self.__dist[v]
+        for v in affected:
+            self.__setParent(v, None)
+            del self.__parent[v]
+
+        G = self.__graph
+        costs = G.getCosts()
+        heap = []
+        for v in affected:
+            best = math.inf
+            bestParent = None
+            for u in G.getInbound(v):
+                if u not in affectedSet and u in self.__dist and self.__dist[u] + costs[(u, v)] < best:
+                    best = self.__dist[u] + costs[(u, v)]
+                    bestParent = u
+            if bestParent is not None:
+                self.__dist[v] = best
+                self.__setParent(v, bestParent)
+                heap.append((best, v))
+        self.__relax(heap)
+
+    def __onChange(self, change, x, y, oldCost, newCost):
+        if change == "addEdge":
+            self.__edgeCheaper(x, y, newCost)
+        elif change == "setCost":
+            if newCost < oldCost:
+                self.__edgeCheaper(x, y, newCost)
+            elif newCost > oldCost and self.__parent.get(y) == x:
+                self.__treeEdgeWorse(y)
+        elif change == "removeEdge":
+            if self.__parent.get(y) == x:
+                self.__treeEdgeWorse(y)
+        elif change == "removeVertex" and x == self.__source:
+            self.__dist.clear()
+            self.__parent.clear()
+            self.__children.clear()
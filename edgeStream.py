@@ -0,0 +1,201 @@
+import json
+import math
+import random
+import sys
+from array import array
+from collections import Counter
+
+from spanningTree import UnionFind
+
+# header written by writeSubgraph before the number of edges is known, rewritten once it is
+_HEADER_WIDTH = 42
+
+
+def _readValues(f, blockSize):
+    '''
+    Reads whitespace separated integers from a binary file one block at a time
+    :return: yields arrays of the integers of every block, a number cut by the end of a block
+        being carried over to the next one
+    '''
+    carry = b""
+    while True:
+        block = f.read(blockSize)
+        if not block:
+            break
+        block = carry + block
+        tokens = block.split()
+        carry = b""
+        if tokens and not block[-1:].isspace():
+            carry = tokens.pop()
+        yield array('q', map(int, tokens))
+    if carry:
+        yield array('q', [int(carry)])
+
+
+def readEdgeChunks(filename, chunkSize=65536, blockSize=1 << 20):
+    '''
+    Reads a "n m / x y c" edge list file in chunks, with the same parsing rules as readEdgeList
+    but without ever holding the whole file: memory depends on chunkSize and blockSize only
+    :param chunkSize: the largest number of edges in a chunk
+    :param blockSize: the number of bytes read from the file at a time
+    :return: yields the header (n, m) first, then (xs, ys, costs) chunks of parallel arrays
+    Raises ValueError if the file is malformed, once the bad part is reached
+    '''
+    with open(filename, "rb") as f:
+        pending = array('q')
+        header = False
+        for values in _readValues(f, blockSize):
+            pending.extend(values)
+            if not header:
+                if len(pending) < 2:
+                    continue
+                yield pending[0], pending[1]
+                del pending[:2]
+                header = True
+            size = 3 * chunkSize
+            while len(pending) >= size:
+                yield pending[0:size:3], pending[1:size:3], pending[2:size:3]
+                del pending[:size]
+        if not header or len(pending) % 3 != 0:
+            raise ValueError("malformed edge list file: " + str(filename))
+        if pending:
+            yield pending[0::3], pending[1::3], pending[2::3]
+
+
+def edgeChunks(filename, chunkSize=65536):
+    '''
+    Opens an edge list file for streaming
+    :return: the number of vertices n and a generator of (xs, ys, costs) chunks, see readEdgeChunks
+    '''
+    chunks = readEdgeChunks(filename, chunkSize)
+    n, m = next(chunks)
+    return n, chunks
+
+
+def _costBin(c):
+    '''
+    Cost histogram bins double in width: 0, then [1, 2), [2, 4), [4, 8)... and the same for negative costs
+    :return: the lower end of the bin of c
+    '''
+    if c == 0:
+        return 0
+    magnitude = 1 << (abs(c).bit_length() - 1)
+    return magnitude if c > 0 else -magnitude
+
+
+def edgeListStats(filename, chunkSize=65536):
+    '''
+    Computes statistics of an edge list file in a single streaming pass, without building a graph
+    Memory is O(n + m + chunkSize) for m distinct edges: two degree arrays and a union-find over compact arrays,
+    plus the set of the edges already seen
+    Like the loaders, the vertices are 0..n-1 plus any other vertex the edges use (they must be non-negative
+    integers here) and a duplicated edge only counts once, with its first cost, so the statistics are those of
+    the graph DirectedGraph(filename) would load; the repeated lines are reported as duplicateEdges
+    :return: a JSON-ready dictionary with the number of vertices, edges and duplicated edges, the self loops,
+        the in-degree and out-degree histograms (degree -> number of vertices), the cost distribution (count, min,
+        max, mean, standard deviation and a histogram of bins doubling in width, keyed by their lower end) and the
+        weakly connected components (their number, the largest size and a size histogram)
+    '''
+    n, chunks = edgeChunks(filename, chunkSize)
+    outDegree = array('q', bytes(8 * n))
+    inDegree = array('q', bytes(8 * n))
+    sets = UnionFind(n)
+    # every edge seen so far, as the integer x << 63 | y since vertices fit in 63 bits
+    seen = set()
+    edges = 0
+    duplicates = 0
+    loops = 0
+    costTotal = 0
+    costSquares = 0
+    costMin = math.inf
+    costMax = -math.inf
+    costBins = Counter()
+    for xs, ys, costs in chunks:
+        top = max(max(xs), max(ys)) + 1
+        if min(min(xs), min(ys)) < 0:
+            raise ValueError("negative vertex in " + str(filename))
+        if top > len(outDegree):
+            outDegree.extend(bytes(8 * (top - len(outDegree))))
+            inDegree.extend(bytes(8 * (top - len(inDegree))))
+            sets.extend(top)
+        kept = []
+        for x, y, c in zip(xs, ys, costs):
+            key = x << 63 | y
+            if key in seen:
+                # the loaders keep the first cost of an edge and ignore the rest
+                duplicates += 1
+                continue
+            seen.add(key)
+            kept.append(c)
+            outDegree[x] += 1
+            inDegree[y] += 1
+            if x == y:
+                loops += 1
+            else:
+                sets.union(x, y)
+        if not kept:
+            continue
+        costs = kept
+        edges += len(costs)
+        costTotal += sum(costs)
+        costSquares += sum(c * c for c in costs)
+        costMin = min(costMin, min(costs))
+        costMax = max(costMax, max(costs))
+        costBins.update(map(_costBin, costs))
+
+    vertices = len(outDegree)
+    componentSizes = Counter(sets.find(v) for v in range(vertices))
+    mean = costTotal / edges if edges else None
+    return {"vertices": vertices, "edges": edges, "duplicateEdges": duplicates, "selfLoops": loops,
+            "outDegreeHistogram": dict(sorted(Counter(outDegree).items())),
+            "inDegreeHistogram": dict(sorted(Counter(inDegree).items())),
+            "costs": {"count": edges, "min": costMin if edges else None, "max": costMax if edges else None,
+                      "mean": mean,
+                      "stddev": math.sqrt(max(0, costSquares / edges - mean * mean)) if edges else None,
+                      "histogram": dict(sorted(costBins.items()))},
+            "weaklyConnectedComponents": {"count": sets.getSetsNumber(),
+                                          "largest": max(componentSizes.values(), default=0),
+                                          "sizeHistogram": dict(sorted(Counter(componentSizes.values()).items()))}}
+
+
+def writeSubgraph(filename, path, keep=None, sample=None, seed=0, chunkSize=65536):
+    '''
+    Streams an edge list file into a new one holding only some of its edges, in the same "n m / x y c" format
+    The number of vertices is kept, so vertex numbers stay valid
+    :param filename: the file to be read
+    :param path: the file to be written
+    :param keep: a function (x, y, cost) -> bool choosing the edges to keep, all of them if None
+    :param sample: if given, every kept edge is only written with this probability
+    :param seed: the seed of the sampling
+    :return: the number of edges written
+    '''
+    rnd = random.Random(seed)
+    n, chunks = edgeChunks(filename, chunkSize)
+    written = 0
+    with open(path, "w") as f:
+        # the header is padded, so it can be rewritten in place with the number of edges
+        f.write(" " * _HEADER_WIDTH + "\n")
+        for xs, ys, costs in chunks:
+            lines = []
+            for x, y, c in zip(xs, ys, costs):
+                if keep is not None and not keep(x, y, c):
+                    continue
+                if sample is not None and rnd.random() >= sample:
+                    continue
+                lines.append("%d %d %d\n" % (x, y, c))
+            f.writelines(lines)
+            written += len(lines)
+        f.seek(0)
+        f.write(("%d %d" % (n, written)).ljust(_HEADER_WIDTH))
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        json.dump(edgeListStats(sys.argv[1]), sys.stdout, indent=2)
+        print()
+    elif len(sys.argv) == 4:
+        print(writeSubgraph(sys.argv[1], sys.argv[2], sample=float(sys.argv[3])), "edges written")
+    else:
+        print("usage: python edgeStream.py <edge list file> [<subgraph file> <sampling probability>]")
+        sys.exit(1)
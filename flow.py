@@ -0,0 +1,404 @@
+import heapq
+import math
+from array import array
+from collections import deque
+
+import instrumentation
+
+
+class FlowNetwork:
+    '''
+    Residual network built from a graph, which is only read: the graph is never changed by the flow algorithms
+    Every edge (x, y) becomes a pair of residual edges 2i (x -> y, with the capacity) and 2i + 1 (y -> x, empty),
+    kept in arrays; adjacent[v] lists the residual edges leaving vertex position v
+    '''
+
+    def __init__(self, G, capacity=None, cost=None):
+        '''
+        :param G: the graph, any backend of the common protocol
+        :param capacity: a dictionary (x, y) -> capacity, G.getCosts() if None; capacities must be non-negative
+        :param cost: a dictionary (x, y) -> cost per unit of flow, only needed by minCostFlow
+        Raises ValueError for a negative capacity
+        '''
+        if capacity is None:
+            capacity = G.getCosts()
+        self.vertices = list(G.getVertices())
+        self.index = {v: i for i, v in enumerate(self.vertices)}
+        index = self.index
+        self.adjacent = [[] for _ in self.vertices]
+        self.head = array('i')
+        self.capacity = []
+        self.cost = [] if cost is not None else None
+        self.edges = []
+        for x in self.vertices:
+            i = index[x]
+            for y in G.getOutbound(x):
+                c = capacity[(x, y)]
+                if c < 0:
+                    raise ValueError("negative capacity on edge " + str((x, y)))
+                j = index[y]
+                e = len(self.head)
+                self.head.extend((j, i))
+                self.capacity.extend((c, 0))
+                if cost is not None:
+                    w = cost[(x, y)]
+                    self.cost.extend((w, -w))
+                self.adjacent[i].append(e)
+                self.adjacent[j].append(e + 1)
+                self.edges.append((x, y))
+        self.original = list(self.capacity)
+
+    def flows(self):
+        '''
+        Returns the current flow as a dictionary (x, y) -> flow, holding the edges with a positive flow
+        '''
+        result = {}
+        for i, edge in enumerate(self.edges):
+            f = self.original[2 * i] - self.capacity[2 * i]
+            if f > 0:
+                result[edge] = f
+        return result
+
+    def residualReachable(self, s):
+        '''
+        Returns the set of vertex positions that can be reached from position s through edges with residual capacity
+        '''
+        seen = {s}
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            for e in self.adjacent[v]:
+                u = self.head[e]
+                if self.capacity[e] > 0 and u not in seen:
+                    seen.add(u)
+                    queue.append(u)
+        return seen
+
+
+def _levels(network, s, t):
+    '''
+    BFS over the residual edges from s
+    :return: the list of levels of the vertex positions, -1 for the ones not reached
+    '''
+    level = [-1] * len(network.vertices)
+    level[s] = 0
+    head = network.head
+    capacity = network.capacity
+    adjacent = network.adjacent
+    queue = deque([s])
+    while queue:
+        v = queue.popleft()
+        for e in adjacent[v]:
+            u = head[e]
+            if capacity[e] > 0 and level[u] < 0:
+                level[u] = level[v] + 1
+                queue.append(u)
+    return level
+
+
+def _blockingFlow(network, s, t, level):
+    '''
+    Saturates every shortest augmenting path of the level graph with an iterative depth-first search;
+    each vertex keeps a pointer to its next untried edge, and dead ends are cut off the level graph
+    :return: the flow added
+    '''
+    head = network.head
+    capacity = network.capacity
+    adjacent = network.adjacent
+    pointer = [0] * len(adjacent)
+    total = 0
+    path = []
+    v = s
+    while True:
+        if v == t:
+            pushed = min(capacity[e] for e in path)
+            total += pushed
+            cut = len(path)
+            for k in range(len(path) - 1, -1, -1):
+                e = path[k]
+                capacity[e] -= pushed
+                capacity[e ^ 1] += pushed
+                if capacity[e] == 0:
+                    cut = k
+            # restart from the tail of the first saturated edge
+            del path[cut:]
+            v = head[path[-1]] if path else s
+            continue
+        edges = adjacent[v]
+        p = pointer[v]
+        while p < len(edges):
+            e = edges[p]
+            if capacity[e] > 0 and level[head[e]] == level[v] + 1:
+                break
+            p += 1
+        pointer[v] = p
+        if p < len(edges):
+            path.append(edges[p])
+            v = head[edges[p]]
+        else:
+            level[v] = -1
+            if not path:
+                return total
+            e = path.pop()
+            v = head[e ^ 1]
+            pointer[v] += 1
+
+
+def dinic(network, s, t):
+    '''
+    Dinic's algorithm: BFS level graphs and blocking flows, O(V^2 E), O(E sqrt(V)) with unit capacities
+    :param network: a FlowNetwork, changed in place to hold the flow
+    :param s: the position of the source
+    :param t: the position of the sink
+    :return: the value of the maximum flow
+    '''
+    total = 0
+    phases = 0
+    while True:
+        level = _levels(network, s, t)
+        if level[t] < 0:
+            break
+        phases += 1
+        total += _blockingFlow(network, s, t, level)
+    instrumentation.count("iterations", phases)
+    return total
+
+
+def _globalRelabel(network, s, t, height, count):
+    '''
+    Sets every height to the exact distance to t in the residual network, or n + the distance to s
+    for the vertices that can no longer reach t (2n for the ones that reach neither)
+    '''
+    n = len(height)
+    head = network.head
+    capacity = network.capacity
+    adjacent = network.adjacent
+    for v in range(n):
+        height[v] = 2 * n
+    for root, base in ((t, 0), (s, n)):
+        height[root] = base
+        queue = deque([root])
+        while queue:
+            v = queue.popleft()
+            for e in adjacent[v]:
+                u = head[e]
+                # e is v -> u, so u can send to v through e ^ 1
+                if capacity[e ^ 1] > 0 and height[u] == 2 * n and u != s and u != t:
+                    height[u] = height[v] + 1
+                    queue.append(u)
+    for i in range(len(count)):
+        count[i] = 0
+    for h in height:
+        count[h] += 1
+
+
+def pushRelabel(network, s, t, globalRelabelFrequency=1.0):
+    '''
+    FIFO push-relabel with the gap and global relabel heuristics, O(V^3)
+    :param network: a FlowNetwork, changed in place to hold the flow
+    :param s: the position of the source
+    :param t: the position of the sink
+    :param globalRelabelFrequency: heights are recomputed exactly after this many times V relabels
+    :return: the value of the maximum flow
+    '''
+    n = len(network.vertices)
+    head = network.head
+    capacity = network.capacity
+    adjacent = network.adjacent
+    height = [0] * n
+    excess = [0] * n
+    count = [0] * (2 * n + 2)
+    pointer = [0] * n
+    active = deque()
+    for e in adjacent[s]:
+        c = capacity[e]
+        if c > 0 and head[e] != s:
+            u = head[e]
+            capacity[e] = 0
+            capacity[e ^ 1] += c
+            excess[u] += c
+            excess[s] -= c
+            if u != t and excess[u] == c:
+                active.append(u)
+    _globalRelabel(network, s, t, height, count)
+    relabels = 0
+    pushes = 0
+    limit = max(1, int(globalRelabelFrequency * n))
+
+    while active:
+        v = active.popleft()
+        edges = adjacent[v]
+        while excess[v] > 0:
+            p = pointer[v]
+            if p == len(edges):
+                # relabel
+                old = height[v]
+                best = 2 * n
+                for e in edges:
+                    if capacity[e] > 0 and height[head[e]] + 1 < best:
+                        best = height[head[e]] + 1
+                count[old] -= 1
+                height[v] = best
+                count[best] += 1
+                pointer[v] = 0
+                relabels += 1
+                if count[old] == 0 and old < n:
+                    # gap: nothing left at height old, the vertices above it can't reach t any more
+                    for u in range(n):
+                        if old < height[u] < n:
+                            count[height[u]] -= 1
+                            height[u] = n + 1
+                            count[n + 1] += 1
+                if relabels % limit == 0:
+                    _globalRelabel(network, s, t, height, count)
+                    pointer = [0] * n
+                continue
+            e = edges[p]
+            u = head[e]
+            if capacity[e] > 0 and height[v] == height[u] + 1:
+                pushed = min(excess[v], capacity[e])
+                capacity[e] -= pushed
+                capacity[e ^ 1] += pushed
+                excess[v] -= pushed
+                excess[u] += pushed
+                pushes += 1
+                if u != s and u != t and excess[u] == pushed:
+                    active.append(u)
+            else:
+                pointer[v] = p + 1
+    instrumentation.count("iterations", relabels)
+    instrumentation.count("moves", pushes)
+    return excess[t]
+
+
+def maxFlow(G, s, t, algorithm="dinic", capacity=None):
+    '''
+    Maximum flow from s to t, the costs of G being used as capacities unless others are given
+    :param G: the graph, it is not changed
+    :param algorithm: "dinic" or "pushRelabel"
+    :param capacity: a dictionary (x, y) -> capacity, G.getCosts() if None
+    :return: the value of the maximum flow and the flow itself as a dictionary (x, y) -> flow
+        holding the edges with a positive flow
+    Raises ValueError for an unknown algorithm, a negative capacity or s == t
+    '''
+    if algorithm not in ("dinic", "pushRelabel"):
+        raise ValueError("unknown algorithm " + str(algorithm))
+    if s == t:
+        raise ValueError("the source and the sink must be different")
+    network = FlowNetwork(G, capacity)
+    run = dinic if algorithm == "dinic" else pushRelabel
+    with instrumentation.phase("maxFlow"):
+        value = run(network, network.index[s], network.index[t])
+    return value, network.flows()
+
+
+def minCut(G, s, t, algorithm="dinic", capacity=None):
+    '''
+    Minimum s-t cut, found from a maximum flow (see maxFlow for the parameters)
+    :return: the capacity of the cut, the set of vertices on the side of s and the list of edges (x, y)
+        going from the side of s to the side of t, whose capacities add up to the cut
+    '''
+    if algorithm not in ("dinic", "pushRelabel"):
+        raise ValueError("unknown algorithm " + str(algorithm))
+    if s == t:
+        raise ValueError("the source and the sink must be different")
+    network = FlowNetwork(G, capacity)
+    run = dinic if algorithm == "dinic" else pushRelabel
+    value = run(network, network.index[s], network.index[t])
+    side = network.residualReachable(network.index[s])
+    index = network.index
+    edges = [(x, y) for x, y in network.edges if index[x] in side and index[y] not in side]
+    return value, {network.vertices[i] for i in side}, edges
+
+
+def minCostFlow(G, s, t, flowLimit=math.inf, capacity=None, cost=None):
+    '''
+    Sends as much flow as possible (at most flowLimit) from s to t at the lowest total cost,
+    with successive shortest paths: every augmenting path is found by Dijkstra on costs made non-negative
+    by vertex potentials, which are kept up to date with the distances found
+    :param G: the graph, it is not changed
+    :param flowLimit: the largest amount of flow sent
+    :param capacity: a dictionary (x, y) -> capacity, 1 for every edge if None (edge disjoint paths)
+    :param cost: a dictionary (x, y) -> cost per unit of flow, G.getCosts() if None; negative costs are allowed
+        as long as there is no negative cost cycle
+    :return: the amount of flow sent, its total cost and the flow as a dictionary (x, y) -> flow
+    Raises ValueError for a negative capacity, a negative cost cycle or s == t
+    '''
+    if s == t:
+        raise ValueError("the source and the sink must be different")
+    if capacity is None:
+        capacity = dict.fromkeys(G.getCosts(), 1)
+    if cost is None:
+        cost = G.getCosts()
+    network = FlowNetwork(G, capacity, cost)
+    n = len(network.vertices)
+    head = network.head
+    residual = network.capacity
+    costs = network.cost
+    adjacent = network.adjacent
+    source = network.index[s]
+    sink = network.index[t]
+
+    # initial potentials: Bellman-Ford distances over the edges with capacity, only needed for negative costs
+    potential = [0] * n
+    if any(c < 0 for c in costs[0::2]):
+        potential = [math.inf] * n
+        potential[source] = 0
+        for _ in range(n):
+            changed = False
+            for v in range(n):
+                if potential[v] == math.inf:
+                    continue
+                for e in adjacent[v]:
+                    if residual[e] > 0 and potential[v] + costs[e] < potential[head[e]]:
+                        potential[head[e]] = potential[v] + costs[e]
+                        changed = True
+            if not changed:
+                break
+        else:
+            raise ValueError("the graph has a negative cost cycle")
+        potential = [p if p < math.inf else 0 for p in potential]
+
+    sent = 0
+    total = 0
+    rounds = 0
+    while sent < flowLimit:
+        dist = [math.inf] * n
+        through = [-1] * n
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            pv = potential[v]
+            for e in adjacent[v]:
+                if residual[e] > 0:
+                    u = head[e]
+                    nd = d + costs[e] + pv - potential[u]
+                    if nd < dist[u]:
+                        dist[u] = nd
+                        through[u] = e
+                        heapq.heappush(heap, (nd, u))
+        if dist[sink] == math.inf:
+            break
+        for v in range(n):
+            if dist[v] < math.inf:
+                potential[v] += dist[v]
+        pushed = flowLimit - sent
+        v = sink
+        while v != source:
+            e = through[v]
+            pushed = min(pushed, residual[e])
+            v = head[e ^ 1]
+        v = sink
+        while v != source:
+            e = through[v]
+            residual[e] -= pushed
+            residual[e ^ 1] += pushed
+            total += pushed * costs[e]
+            v = head[e ^ 1]
+        sent += pushed
+        rounds += 1
+    instrumentation.count("iterations", rounds)
+    return sent, total, network.flows()
@@ -0,0 +1,88 @@
+import math
+
+
+def costMatrix(G):
+    '''
+    Builds the dense cost matrix of a graph from G.getCosts()
+    :param G: the graph
+    :return: the list of vertices and a list of rows, matrix[i][j] being the cost of the edge
+        from vertices[i] to vertices[j], 0 on the diagonal and math.inf where there is no edge
+    '''
+    vertices = list(G.getVertices())
+    index = {v: i for i, v in enumerate(vertices)}
+    n = len(vertices)
+    matrix = [[math.inf] * n for _ in range(n)]
+    for i in range(n):
+        matrix[i][i] = 0
+    for (x, y), c in G.getCosts().items():
+        row = matrix[index[x]]
+        j = index[y]
+        if c < row[j]:
+            row[j] = c
+    return vertices, matrix
+
+
+def FloydWarshall(G, paths=False):
+    '''
+    All pairs lowest costs with the Floyd-Warshall algorithm
+    For every intermediate vertex k each row is updated in one go from row k (a whole-row min-plus step),
+    and rows that can't reach k are skipped
+    :param G: the graph
+    :param paths: if True a predecessor matrix is built as well, see matrixPath
+    :return: the list of vertices, the distance matrix (indexed like the vertices list) and the predecessor
+        matrix (None if paths is False); None if the graph has a negative cost cycle
+    '''
+    vertices, dist = costMatrix(G)
+    n = len(vertices)
+    pred = None
+    if paths:
+        pred = [[i if dist[i][j] != math.inf and i != j else None for j in range(n)] for i in range(n)]
+
+    for k in range(n):
+        rowK = dist[k]
+        predK = pred[k] if paths else None
+        for i in range(n):
+            rowI = dist[i]
+            dik = rowI[k]
+            if dik == math.inf or i == k:
+                continue
+            if paths:
+                predI = pred[i]
+                for j, c in enumerate(rowK):
+                    nd = dik + c
+                    if nd < rowI[j]:
+                        rowI[j] = nd
+                        predI[j] = predK[j]
+            else:
+                rowI[:] = [d if d <= dik + c else dik + c for d, c in zip(rowI, rowK)]
+        if rowK[k] < 0:
+            return None
+
+    for i in range(n):
+        if dist[i][i] < 0:
+            return None
+    return vertices, dist, pred
+
+
+def matrixPath(vertices, pred, s, t):
+    '''
+    Rebuilds a lowest cost path from the predecessor matrix returned by FloydWarshall
+    :param vertices: the list of vertices returned by FloydWarshall
+    :param pred: the predecessor matrix returned by FloydWarshall
+    :param s: the starting vertex
+    :param t: the end vertex
+    :return: the list of vertices from s to t, None if t can't be reached from s
+    '''
+    index = {v: i for i, v in enumerate(vertices)}
+    i = index[s]
+    j = index[t]
+    if i == j:
+        return [s]
+    if pred[i][j] is None:
+        return None
+    path = [t]
+    while j != i:
+        j = pred[i][j]
+        path.append(vertices[j])
+    path.reverse()
+    return path
@@ -0,0 +1,171 @@
+import math
+import multiprocessing
+from itertools import chain, filterfalse
+from operator import indexOf
+
+import instrumentation
+import traversal
+
+# state of a worker process, set once by _initWorker: the graph, and the visited marks in shared memory,
+# which the main process updates between levels, so that neither is sent again with every level
+_graph = None
+_marks = None
+
+# returned by next() when no inbound neighbour is in the frontier, as any value could be a vertex
+_NOT_FOUND = object()
+
+
+def _initWorker(graph, marks, shared=False):
+    '''
+    :param marks: the visited marks, a shared ctypes array if shared is True
+    '''
+    global _graph, _marks
+    _graph = graph
+    _marks = memoryview(marks).cast('B') if shared else marks
+
+
+def _children(vertices):
+    '''
+    Top-down step over one piece of the frontier
+    :return: for every vertex of the piece, the list of its outbound neighbours that were not visited
+        when the level started
+    '''
+    G = _graph
+    visited = _marks.__getitem__
+    return [list(filterfalse(visited, G.getOutbound(x))) for x in vertices]
+
+
+def _parents(vertices):
+    '''
+    Bottom-up step over one piece of the unvisited vertices: every vertex stops at its first inbound neighbour
+    that is visited. While a bottom-up level runs only the frontier is visited among the inbound neighbours of
+    an unvisited vertex (anything visited earlier would have reached it already, and the vertices found in this
+    level are only marked once it ends), so that neighbour is in the frontier and is a valid BFS parent
+    :return: the (vertex, parent) pairs found, the vertices still not visited and the number of edges scanned
+    '''
+    G = _graph
+    visited = _marks.__getitem__
+    found = []
+    left = []
+    scans = 0
+    for v in vertices:
+        if visited(v):
+            # reached by a top-down level since the list was made
+            continue
+        inbound = G.getInbound(v)
+        u = next(filter(visited, inbound), _NOT_FOUND)
+        if u is _NOT_FOUND:
+            left.append(v)
+            scans += len(inbound)
+        else:
+            found.append((v, u))
+            scans += indexOf(inbound, u) + 1
+    return found, left, scans
+
+
+def _pieces(items, chunks):
+    step = max(1, math.ceil(len(items) / chunks))
+    return [items[i:i + step] for i in range(0, len(items), step)]
+
+
+def frontierBFS(G, start, alpha=4, beta=24, processes=1, chunks=None, minParallel=4096):
+    '''
+    Level synchronous breadth-first search that switches between expanding the frontier (top-down) and
+    letting the unvisited vertices look for a parent in it (bottom-up, Beamer's direction optimization).
+    Bottom-up levels are used while the edges leaving the frontier outnumber those entering the unvisited
+    vertices divided by alpha, until the frontier is smaller than the number of vertices divided by beta.
+    A bottom-up level stops scanning the inbound edges of a vertex at the first one coming from the frontier,
+    so on low diameter graphs most of the edges leading back into the visited part are never looked at
+    :param G: the graph on which the search is performed, getInbound is used by the bottom-up levels
+    :param start: the starting vertex
+    :param alpha: a larger value switches to bottom-up earlier
+    :param beta: a larger value switches back to top-down later
+    :param processes: the number of worker processes sharing the large levels, 1 for none, None for
+        os.cpu_count(); only used on CSRGraph, whose visited marks are a byte array the workers read
+        from shared memory, other graphs are searched in this process
+    :param chunks: the number of pieces a level is split in, 4 per process if None
+    :param minParallel: the smallest frontier (or set of unvisited vertices) handed to the worker processes
+    :return: a dictionary of distances (how many steps to reach the vertex) and a dictionary containing
+        the parent of each vertex; the distances are those of graphAlgorithms.BFS and every parent is one
+        BFS could have picked (one step closer to start, with an edge to the vertex), though not always the same
+    '''
+    marks = traversal.newMarks(G)
+    n = G.getVerticesNumber()
+    pool = None
+    if processes != 1 and isinstance(marks, bytearray):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        shared = context.RawArray('B', n)
+        marks = memoryview(shared).cast('B')
+        pool = context.Pool(processes, initializer=_initWorker, initargs=(G, shared, True))
+        chunks = chunks or 4 * (processes or multiprocessing.cpu_count())
+    _initWorker(G, marks)
+
+    marks[start] = 1
+    distances = {start: 0}
+    parent = {start: None}
+    # edges entering the vertices not visited yet
+    unexplored = len(G.getCosts()) - G.getInDegree(start)
+    frontier = [start]
+    unvisited = None
+    depth = 0
+    bottomUp = False
+    bottomUpLevels = 0
+    scans = 0
+    try:
+        while frontier:
+            depth += 1
+            if bottomUp:
+                bottomUp = len(frontier) >= n / beta
+                frontierEdges = 0
+            else:
+                frontierEdges = sum(G.getOutDegree(x) for x in frontier)
+                bottomUp = frontierEdges > unexplored / alpha
+            following = []
+            if bottomUp:
+                bottomUpLevels += 1
+                if unvisited is None:
+                    # vertices without inbound edges can't be reached, they are left out once and for all
+                    inDegree = G.getInDegree
+                    unvisited = [v for v in G.getVertices() if not marks[v] and inDegree(v)]
+                if pool is not None and len(unvisited) >= minParallel:
+                    results = pool.map(_parents, _pieces(unvisited, chunks))
+                else:
+                    results = [_parents(unvisited)]
+                for found, left, scanned in results:
+                    scans += scanned
+                    for y, x in found:
+                        marks[y] = 1
+                        distances[y] = depth
+                        parent[y] = x
+                        following.append(y)
+                unvisited = list(chain.from_iterable(left for found, left, scanned in results))
+            else:
+                scans += frontierEdges or sum(G.getOutDegree(x) for x in frontier)
+                if pool is not None and len(frontier) >= minParallel:
+                    parts = _pieces(frontier, chunks)
+                    pieces = zip(parts, pool.map(_children, parts))
+                else:
+                    pieces = ((frontier, [G.getOutbound(x) for x in frontier]),)
+                for part, neighbours in pieces:
+                    for x, ys in zip(part, neighbours):
+                        for y in ys:
+                            if not marks[y]:
+                                marks[y] = 1
+                                distances[y] = depth
+                                parent[y] = x
+                                following.append(y)
+            frontier = following
+            unexplored -= sum(G.getInDegree(y) for y in frontier)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    stats = instrumentation.active()
+    if stats is not None:
+        stats.add("vertexVisits", len(distances))
+        stats.add("edgeScans", scans)
+        stats.add("iterations", depth)
+        stats.add("bottomUpLevels", bottomUpLevels)
+    return distances, parent
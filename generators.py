@@ -0,0 +1,121 @@
+import random
+
+
+def erdosRenyi(n, m, seed=0, maxCost=100):
+    '''
+    Random graph with m edges whose endpoints are drawn uniformly (the G(n, m) model)
+    Duplicated edges and loops are possible, the loaders drop duplicates
+    :return: yields (x, y, cost)
+    '''
+    rnd = random.Random(seed)
+    for _ in range(m):
+        yield rnd.randrange(n), rnd.randrange(n), rnd.randint(1, maxCost)
+
+
+def rmat(scale, m, seed=0, maxCost=100, a=0.57, b=0.19, c=0.19):
+    '''
+    Power-law graph on 2^scale vertices with the recursive matrix (R-MAT) model: every edge picks
+    one quadrant of the adjacency matrix at a time with probabilities a, b, c and 1 - a - b - c
+    :return: yields (x, y, cost)
+    '''
+    rnd = random.Random(seed)
+    ab = a + b
+    abc = a + b + c
+    for _ in range(m):
+        x = y = 0
+        for _ in range(scale):
+            r = rnd.random()
+            x <<= 1
+            y <<= 1
+            if r >= abc:
+                x |= 1
+                y |= 1
+            elif r >= ab:
+                x |= 1
+            elif r >= a:
+                y |= 1
+        yield x, y, rnd.randint(1, maxCost)
+
+
+def grid(rows, cols, seed=0, maxCost=100):
+    '''
+    rows x cols grid, vertex r * cols + c being linked both ways to its right and lower neighbours
+    :return: yields (x, y, cost)
+    '''
+    rnd = random.Random(seed)
+    for r in range(rows):
+        for c in range(cols):
+            v = r * cols + c
+            if c + 1 < cols:
+                yield v, v + 1, rnd.randint(1, maxCost)
+                yield v + 1, v, rnd.randint(1, maxCost)
+            if r + 1 < rows:
+                yield v, v + cols, rnd.randint(1, maxCost)
+                yield v + cols, v, rnd.randint(1, maxCost)
+
+
+def gridEdgesNumber(rows, cols):
+    return 2 * (rows * (cols - 1) + cols * (rows - 1))
+
+
+def randomDAG(n, m, seed=0, maxCost=100):
+    '''
+    Random DAG with m edges: edges go from a lower to a higher position of a random vertex order,
+    so the vertex numbers themselves are not a topological order
+    :return: yields (x, y, cost)
+    '''
+    rnd = random.Random(seed)
+    order = list(range(n))
+    rnd.shuffle(order)
+    for _ in range(m):
+        i = rnd.randrange(n - 1)
+        j = rnd.randrange(i + 1, n)
+        yield order[i], order[j], rnd.randint(1, maxCost)
+
+
+def writeEdgeList(filename, n, m, edges):
+    '''
+    Writes edges in the "n m / x y c" format of 1k.txt and 10k.txt, streaming them to the file
+    :param n: the number of vertices
+    :param m: the number of edges that will be written
+    :param edges: an iterable of (x, y, cost)
+    '''
+    with open(filename, "w") as f:
+        f.write("%d %d\n" % (n, m))
+        lines = []
+        for x, y, c in edges:
+            lines.append("%d %d %d\n" % (x, y, c))
+            if len(lines) >= 65536:
+                f.writelines(lines)
+                lines = []
+        f.writelines(lines)
+
+
+def generate(family, edges, filename, seed=0):
+    '''
+    Writes a graph of the given family with about the given number of edges (about 4 per vertex)
+    :param family: "er", "rmat", "grid" or "dag"
+    :return: the number of vertices and edges written
+    Raises ValueError for an unknown family
+    '''
+    if family == "er":
+        n = max(2, edges // 4)
+        m = edges
+        writeEdgeList(filename, n, m, erdosRenyi(n, m, seed))
+    elif family == "rmat":
+        scale = max(1, (edges // 4).bit_length() - 1)
+        n = 1 << scale
+        m = edges
+        writeEdgeList(filename, n, m, rmat(scale, m, seed))
+    elif family == "grid":
+        side = max(2, int((edges / 4) ** 0.5))
+        n = side * side
+        m = gridEdgesNumber(side, side)
+        writeEdgeList(filename, n, m, grid(side, side, seed))
+    elif family == "dag":
+        n = max(2, edges // 4)
+        m = edges
+        writeEdgeList(filename, n, m, randomDAG(n, m, seed))
+    else:
+        raise ValueError("unknown graph family " + str(family))
+    return n, m
@@ -1,4 +1,34 @@
 import copy
+from array import array
+
+import instrumentation
+
+
+def readEdgeList(filename):
+    '''
+    Reads a whole "n m / x y c" edge list file in one go
+    :param filename: the file to be read
+    :return: the number of vertices and three parallel arrays with the sources, targets and costs of the edges
+    '''
+    with open(filename, "rb") as f:
+        values = array('q', map(int, f.read().split()))
+    if len(values) < 2 or (len(values) - 2) % 3 != 0:
+        raise ValueError("malformed edge list file: " + str(filename))
+    return values[0], values[2::3], values[3::3], values[4::3]
+
+
+def uniqueEdges(xs, ys, costs):
+    '''
+    Deduplicates edges in bulk
+    :return: a dictionary (x, y) -> cost in the order the edges first appear;
+        a duplicated edge keeps its first cost, like DirectedGraph.addEdge
+    '''
+    cost = dict(zip(zip(xs, ys), costs))
+    if len(cost) != len(costs):
+        # updating an existing key keeps its position, so this only restores the first costs
+        for edge, c in zip(zip(reversed(xs), reversed(ys)), reversed(costs)):
+            cost[edge] = c
+    return cost
 
 
 class DirectedGraph:
@@ -7,17 +37,59 @@ class DirectedGraph:
         self.__inbound = {}
         self.__outbound = {}
         self.__cost = {}
-        self.__loadFromFile(filename)
+        self.__listeners = []
+        self.__changeLog = None
+        self.__version = 0
+        if filename is not None:
+            with instrumentation.phase("load"):
+                self.__loadFromFile(filename)
+
+    """
+    Registers a function that is called after every change made to the graph as
+    listener(change, x, y, oldCost, newCost), change being one of:
+    "addVertex" (x is the vertex), "removeVertex" (x is the vertex, reported after its edges were removed),
+    "addEdge", "removeEdge" and "setCost" (x, y is the edge, a missing cost is None)
+    Listeners are not copied by copy() nor pickled with the graph
+    """
+
+    def addListener(self, listener):
+        self.__listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.__listeners.remove(listener)
+
+    def __notify(self, change, x, y=None, oldCost=None, newCost=None):
+        for listener in self.__listeners:
+            listener(change, x, y, oldCost, newCost)
+
+    """
+    Returns a counter increased by every change made to the graph, so results computed on it
+    can be checked for staleness in O(1) (see pathCache.PathCache)
+    """
+
+    def getVersion(self):
+        return self.__version
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_DirectedGraph__listeners"] = []
+        state["_DirectedGraph__changeLog"] = None
+        return state
 
     """
     Adds a new vertex to the inbound and outbound disctionaries
     Initially the vertex's inbound and outbound edges are empty
+    The neighbours of a vertex are kept as the keys of a dictionary, so they can be
+    checked, added and removed in O(1) while keeping their insertion order
     """
 
     def addVertex(self, v):
         if not self.vertexExists(v):
-            self.__inbound[v] = []
-            self.__outbound[v] = []
+            self.__inbound[v] = {}
+            self.__outbound[v] = {}
+            self.__version += 1
+            if self.__listeners:
+                self.__notify("addVertex", v)
 
     """
     Checks if a vertex already exists
@@ -47,9 +119,12 @@ class DirectedGraph:
         if not self.vertexExists(y):
             self.addVertex(y)
         if not self.edgeExists(x, y):
-            self.__outbound[x].append(y)
-            self.__inbound[y].append(x)
+            self.__outbound[x][y] = None
+            self.__inbound[y][x] = None
             self.__cost[(x, y)] = cost
+            self.__version += 1
+            if self.__listeners:
+                self.__notify("addEdge", x, y, None, cost)
 
     """
     Removes an edge and its corresponding cost from the graph if it exists
@@ -57,8 +132,12 @@ class DirectedGraph:
 
     def removeEdge(self, x, y):
         if self.edgeExists(x, y):
-            self.__outbound[x].remove(y)
-            del self.__cost[(x, y)]
+            del self.__outbound[x][y]
+            del self.__inbound[y][x]
+            cost = self.__cost.pop((x, y))
+            self.__version += 1
+            if self.__listeners:
+                self.__notify("removeEdge", x, y, cost, None)
 
     """
     Removes a vertex and all its references from the graph (inbounds, outbound and cost)
@@ -66,12 +145,22 @@ class DirectedGraph:
 
     def removeVertex(self, v):
         if self.vertexExists(v):
+            if self.__listeners:
+                for el in list(self.__outbound[v]):
+                    self.removeEdge(v, el)
+                for el in list(self.__inbound[v]):
+                    self.removeEdge(el, v)
             for el in self.__outbound[v]:
-                del self.__cost[(v, el)]
+                self.__cost.pop((v, el), None)
+                self.__inbound[el].pop(v, None)
             for el in self.__inbound[v]:
-                del self.__cost[(v, el)]
+                self.__cost.pop((el, v), None)
+                self.__outbound[el].pop(v, None)
             del self.__inbound[v]
             del self.__outbound[v]
+            self.__version += 1
+            if self.__listeners:
+                self.__notify("removeVertex", v)
 
     """
     Returns all the inbound edges of a given vertex v
@@ -80,7 +169,7 @@ class DirectedGraph:
 
     def getInbound(self, v):
         if self.vertexExists(v):
-            return self.__inbound[v]
+            return self.__inbound[v].keys()
 
     """
     Returns all the outbound edges of a given vertex v
@@ -89,7 +178,7 @@ class DirectedGraph:
 
     def getOutbound(self, v):
         if self.vertexExists(v):
-            return self.__outbound[v]
+            return self.__outbound[v].keys()
 
     """
     Returns the cost associated with an edge
@@ -119,7 +208,11 @@ class DirectedGraph:
 
     def setCost(self, x, y, newCost):
         if self.edgeExists(x, y):
+            oldCost = self.__cost[(x, y)]
             self.__cost[(x, y)] = newCost
+            self.__version += 1
+            if self.__listeners:
+                self.__notify("setCost", x, y, oldCost, newCost)
 
     def getInDegree(self, v):
         if self.vertexExists(v):
@@ -133,30 +226,71 @@ class DirectedGraph:
         return self.__outbound
 
     def __loadFromFile(self, filename):
-        with open(filename, "r") as f:
-            args = f.readline()
-            args = args.split(" ")
-            for x in range(0, int(args[0])):
+        n, xs, ys, costs = readEdgeList(filename)
+        self.__cost = uniqueEdges(xs, ys, costs)
+        for x in range(0, n):
+            self.addVertex(x)
+        outbound = self.__outbound
+        inbound = self.__inbound
+        for x, y in self.__cost:
+            if x not in outbound:
                 self.addVertex(x)
-            for line in f:
-                item = line.strip()
-                item = item.split(" ")
-                item = [x.strip() for x in item]
-                self.addEdge(int(item[0]), int(item[1]), int(item[2]))
+            if y not in outbound:
+                self.addVertex(y)
+            outbound[x][y] = None
+            inbound[y][x] = None
 
     def copy(self):
         '''
         Generates a deep copy of the graph
+        For a read-only copy, snapshot() is O(1)
         :return:
         '''
         return copy.deepcopy(self)
 
+    def getChangeLog(self):
+        '''
+        Returns the ChangeLog recording the changes made to the graph, started on the first call
+        '''
+        if self.__changeLog is None:
+            from changeLog import ChangeLog
+            self.__changeLog = ChangeLog(self)
+        return self.__changeLog
+
+    def snapshot(self):
+        '''
+        Returns an O(1) read-only view of the graph as it is now, which later changes don't affect
+        (see ChangeLog and GraphSnapshot)
+        '''
+        return self.getChangeLog().snapshot()
+
+    def save(self, path):
+        '''
+        Writes the graph to a binary snapshot file (see CSRGraph.save)
+        The vertices of the graph must be the integers 0..n-1
+        '''
+        from csrGraph import CSRGraph
+        CSRGraph.fromDirectedGraph(self).save(path)
+
+    @staticmethod
+    def load(path, mmap=True):
+        '''
+        Opens a snapshot written by save()
+        :param mmap: if True the arrays are mapped from the file instead of being copied into memory
+        :return: a read-only CSRGraph, which supports the same queries as DirectedGraph
+        '''
+        from csrGraph import CSRGraph
+        return CSRGraph.load(path, mmap)
+
 
 class UndirectedGraph:
-    def __init__(self, filename):
+    def __init__(self, filename=None):
         self.__edge = {}
         self.__cost = {}
-        self.__loadFromFile(filename)
+        self.__version = 0
+        if filename is not None:
+            with instrumentation.phase("load"):
+                self.__loadFromFile(filename)
 
     def parseX(self):
         '''Returns an iterable object that parses all the
@@ -166,18 +300,57 @@ class UndirectedGraph:
     def parseN(self, x):
         '''Returns an iterable object that parses all the
         inbound neighbours of x'''
-        return self.__edge[x]
+        return self.__edge[x].keys()
 
     def isEdge(self, x, y):
         '''Returns True if there is an edge from x to y'''
         return y in self.__edge[x]
 
     def addVertex(self, v):
-        self.__edge[v] = []
+        '''The neighbours of a vertex are the keys of an insertion ordered dictionary,
+        so edge checks are O(1)'''
+        self.__edge[v] = {}
+        self.__version += 1
+
+    def getVersion(self):
+        '''Returns a counter increased by every change made to the graph'''
+        return self.__version
 
     def getCosts(self):
         return self.__cost
 
+    def getVertices(self):
+        '''Returns a dictionary vertex -> neighbours, like DirectedGraph.getVertices()'''
+        return self.__edge
+
+    def getVerticesNumber(self):
+        return len(self.__edge)
+
+    def vertexExists(self, v):
+        return v in self.__edge
+
+    def edgeExists(self, x, y):
+        return x in self.__edge and y in self.__edge[x]
+
+    def getOutbound(self, v):
+        '''Every edge is seen in both directions, so the outbound and inbound
+        neighbours of v are all its neighbours'''
+        if v in self.__edge:
+            return self.__edge[v].keys()
+
+    def getInbound(self, v):
+        return self.getOutbound(v)
+
+    def getOutDegree(self, v):
+        if v in self.__edge:
+            return len(self.__edge[v])
+
+    def getInDegree(self, v):
+        return self.getOutDegree(v)
+
+    def getCost(self, x, y):
+        return self.__cost.get((x, y))
+
     def addEdge(self, x, y, cost):
         '''
         Adds an edge between x and y
@@ -187,20 +360,23 @@ class UndirectedGraph:
         '''
         if self.isEdge(x, y):
             return False
-        self.__edge[y].append(x)
-        self.__edge[x].append(y)
+        self.__edge[y][x] = None
+        self.__edge[x][y] = None
         self.__cost[(x, y)] = cost
         self.__cost[(y, x)] = cost
+        self.__version += 1
         return True
 
-    def __loadFromFile(self,filename):
-        with open(filename, "r") as f:
-            args = f.readline()
-            args = args.split(" ")
-            for x in range(0, int(args[0])):
-                self.addVertex(x)
-            for line in f:
-                item = line.strip()
-                item = item.split(" ")
-                item = [x.strip() for x in item]
-                self.addEdge(int(item[0]), int(item[1]), int(item[2]))
\ No newline at end of file
+    def __loadFromFile(self, filename):
+        n, xs, ys, costs = readEdgeList(filename)
+        for x in range(0, n):
+            self.addVertex(x)
+        edge = self.__edge
+        cost = self.__cost
+        for (x, y), c in uniqueEdges(xs, ys, costs).items():
+            if (x, y) in cost:
+                continue
+            edge[y][x] = None
+            edge[x][y] = None
+            cost[(x, y)] = c
+            cost[(y, x)] = c
@@ -1,5 +1,11 @@
 import heapq
 import math
+import weakref
+from collections import deque
+
+import instrumentation
+import traversal
+import tsp
 
 
 def BFS(G, start):
@@ -12,40 +18,38 @@ def BFS(G, start):
     """
     distances = {start: 0}
     parent = {start: None}
-    queue = [start]
-    while len(queue) > 0:
-        node = queue[0]
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        d = distances[node] + 1
         for i in G.getOutbound(node):
-            if i in distances.keys():
+            if i in distances:
                 continue
             parent[i] = node
-            distances[i] = distances[node] + 1
+            distances[i] = d
             queue.append(i)
-        queue.pop(0)
+    stats = instrumentation.active()
+    if stats is not None:
+        stats.add("vertexVisits", len(distances))
+        stats.add("edgeScans", sum(G.getOutDegree(v) for v in distances))
     return distances, parent
 
 
 def shortestPathReverseBFS(G, start, target):
     """
     Performs a reverse breath first traversal of the spanning tree of  G
+    The breadth first search stops as soon as target is reached
     :param G: The graph on which the search is performed
     :param start:  the starting vertex
     :param target:  the end vertex
     :return: the shortest path from start to target if it exists, none otherwise
     """
-    distances, parent = BFS(G, start)
-    if target not in parent.keys():
-        return None
-
-    result = []
-    current = target
-    while current != start:
-        result.append(current)
-        current = parent[current]
-
-    result.append(start)
-    result.reverse()
-    return result
+    parent = {}
+    for v, depth, p in traversal.bfs(G, start):
+        parent[v] = p
+        if v == target:
+            return buildPath(parent, target)
+    return None
 
 
 def DFS(G):
@@ -64,20 +68,32 @@ def DFS(G):
 
 def DFSVisit(G, s, parent,):
     """
-    Recursively visits every vertex in a depth-fist manner
+    Visits every vertex reachable from s in a depth-fist manner, using an explicit stack
     :param G: a given graph
     :param s: the current vertex
     :param parent: a list that represent the depth-fist forrest up to this point
                     keeps track of the vertices visited so far
     """
-    for v in G.getOutbound(s):
-        if v not in parent:
-            parent[v] = s
-            DFSVisit(G, v, parent)
+    stack = [(s, iter(G.getOutbound(s)))]
+    while stack:
+        x, neighbours = stack[-1]
+        for v in neighbours:
+            if v not in parent:
+                parent[v] = x
+                stack.append((v, iter(G.getOutbound(v))))
+                break
+        else:
+            stack.pop()
 
 
 def BellmanFord(G, w, s):
     """
+    The Ford's algorithm: relaxes every edge in rounds, stopping early when a round changes nothing
+    :param G: the graph on which the search is performed
+    :param w: a dictionary (x, y) -> cost
+    :param s: the starting vertex
+    :return: a dictionary of distances and a dictionary containing the parent of each reached vertex,
+        or two empty dictionaries if a negative cost cycle is accessible from s
     """
     dist = {}
     parent = {s: None}
@@ -86,41 +102,322 @@ def BellmanFord(G, w, s):
     dist[s] = 0
     v = G.getVertices()
 
-    for i in range(1, G.getVerticesNumber()):
-        for x in v:
-            for e in v[x]:
-                if dist[e] > dist[x] + w[(x, e)]:
-                    dist[e] = dist[x] + w[(x, e)]
-                    parent[e] = x
-
-    for x in v:
-        for e in v[x]:
-            if dist[e] > dist[x] + w[(x, e)]:
-                return {}, {}
+    rounds = 0
+    relaxations = 0
+    negative = False
+    with instrumentation.phase("relax"):
+        for i in range(1, G.getVerticesNumber()):
+            rounds += 1
+            changed = False
+            for x in v:
+                for e in v[x]:
+                    if dist[e] > dist[x] + w[(x, e)]:
+                        dist[e] = dist[x] + w[(x, e)]
+                        parent[e] = x
+                        relaxations += 1
+                        changed = True
+            if not changed:
+                break
+        else:
+            negative = any(dist[e] > dist[x] + w[(x, e)] for x in v for e in v[x])
+
+    stats = instrumentation.active()
+    if stats is not None:
+        stats.add("iterations", rounds)
+        stats.add("relaxations", relaxations)
+        stats.add("edgeScans", rounds * sum(len(v[x]) for x in v))
+    if negative:
+        return {}, {}
     return dist, parent
 
 
-def lowestCostPath(G, s, t):
+def SPFA(G, w, s):
     """
-    Write a program that, given a graph with costs and two vertices,
-    finds a lowest cost walk between the given vertices,
-    or prints a message if there are negative cost cycles accessible from the starting vertex.
-    The program will use the Ford's algorithm.
+    Queue based Bellman-Ford: only the edges leaving vertices whose distance changed are relaxed again,
+    so the search ends as soon as the distances converge
+    :param G: the graph on which the search is performed
+    :param w: a dictionary (x, y) -> cost, it is only read
+    :param s: the starting vertex
+    :return: a dictionary of distances, a dictionary containing the parent of each reached vertex and None;
+        if a negative cost cycle is accessible from s, two empty dictionaries and the cycle as a list of vertices
+        [v1, v2, ..., vk] with the edges v1->v2, ..., vk->v1
     """
-    res, parent = BellmanFord(G, G.getCosts(), s)
-    if res == {}:
-        print("negative cycle detected")
-        return
-    if t not in parent:
-        print("can't reach "+str(t)+" from "+str(s))
-        return
+    n = G.getVerticesNumber()
+    dist = {}
+    for e in G.getVertices().keys():
+        dist[e] = math.inf
+    dist[s] = 0
+    parent = {s: None}
+    # number of edges on the current path to each vertex, reaching n means the parents contain a cycle
+    length = {s: 0}
+    queue = deque([s])
+    queued = {s}
+    visits = 0
+    relaxations = 0
+    cycle = None
+    with instrumentation.phase("relax"):
+        while queue and cycle is None:
+            x = queue.popleft()
+            queued.discard(x)
+            visits += 1
+            for y in G.getOutbound(x):
+                nd = dist[x] + w[(x, y)]
+                if nd < dist[y]:
+                    dist[y] = nd
+                    parent[y] = x
+                    relaxations += 1
+                    length[y] = length[x] + 1
+                    if length[y] >= n:
+                        cycle = findParentCycle(parent, y)
+                        if cycle is not None:
+                            break
+                    if y not in queued:
+                        queued.add(y)
+                        queue.append(y)
+
+    stats = instrumentation.active()
+    if stats is not None:
+        stats.add("vertexVisits", visits)
+        stats.add("relaxations", relaxations)
+    if cycle is not None:
+        return {}, {}, cycle
+    return dist, parent, None
+
+
+def findParentCycle(parent, v):
+    """
+    Follows the parent links starting from v
+    :return: the cycle they run into as a list of vertices in edge order, None if they reach the root instead
+    """
+    position = {}
+    walk = []
+    current = v
+    while current is not None and current not in position:
+        position[current] = len(walk)
+        walk.append(current)
+        current = parent[current]
+    if current is None:
+        return None
+    cycle = walk[position[current]:]
+    cycle.reverse()
+    return cycle
+
+
+def Dijkstra(G, w, s, target=None):
+    """
+    Dijkstra's algorithm with a binary heap and lazy deletion (stale heap entries are skipped when popped)
+    :param G: the graph on which the search is performed
+    :param w: a dictionary (x, y) -> cost, every cost must be non-negative
+    :param s: the starting vertex
+    :param target: if given, the search stops as soon as the distance of target is final
+    :return: a dictionary of distances and a dictionary containing the parent of each vertex,
+        both only hold the vertices reached from s
+    """
+    dist = {s: 0}
+    parent = {s: None}
+    done = set()
+    heap = [(0, s)]
+    pops = 0
+    pushes = 1
+    while heap:
+        d, x = heapq.heappop(heap)
+        pops += 1
+        if x in done:
+            continue
+        done.add(x)
+        if x == target:
+            break
+        for y in G.getOutbound(x):
+            nd = d + w[(x, y)]
+            if y not in dist or nd < dist[y]:
+                dist[y] = nd
+                parent[y] = x
+                pushes += 1
+                heapq.heappush(heap, (nd, y))
+
+    stats = instrumentation.active()
+    if stats is not None:
+        _reportHeapSearch(stats, G, done, target, pushes, pops)
+    return dist, parent
+
+
+def _reportHeapSearch(stats, G, done, target, pushes, pops):
+    '''
+    Adds the counts of a Dijkstra-like search to stats; every push but the first one is a relaxation
+    and the edges of every settled vertex but target were scanned
+    '''
+    stats.add("vertexVisits", len(done))
+    stats.add("edgeScans", sum(G.getOutDegree(x) for x in done if x != target))
+    stats.add("relaxations", pushes - 1)
+    stats.add("heapPushes", pushes)
+    stats.add("heapPops", pops)
+
+
+def bidirectionalDijkstra(G, w, s, t):
+    """
+    Runs Dijkstra forward from s over getOutbound and backward from t over getInbound at the same time,
+    stopping when the two searches can no longer improve the best meeting point
+    :param G: the graph on which the search is performed
+    :param w: a dictionary (x, y) -> cost, every cost must be non-negative
+    :param s: the starting vertex
+    :param t: the end vertex
+    :return: the cost of the lowest cost path and the path itself, (math.inf, None) if t can't be reached
+    """
+    if s == t:
+        return 0, [s]
+    dist = ({s: 0}, {t: 0})
+    parent = ({s: None}, {t: None})
+    done = (set(), set())
+    heaps = ([(0, s)], [(0, t)])
+    neighbours = (G.getOutbound, G.getInbound)
+    best = math.inf
+    meeting = None
+    pops = 0
+    pushes = 2
+    scans = 0
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, x = heapq.heappop(heaps[side])
+        pops += 1
+        if x in done[side]:
+            continue
+        done[side].add(x)
+        for y in neighbours[side](x):
+            scans += 1
+            nd = d + (w[(x, y)] if side == 0 else w[(y, x)])
+            if y not in dist[side] or nd < dist[side][y]:
+                dist[side][y] = nd
+                parent[side][y] = x
+                pushes += 1
+                heapq.heappush(heaps[side], (nd, y))
+            if y in dist[1 - side] and nd + dist[1 - side][y] < best:
+                best = nd + dist[1 - side][y]
+                meeting = y
+
+    stats = instrumentation.active()
+    if stats is not None:
+        stats.add("vertexVisits", len(done[0]) + len(done[1]))
+        stats.add("edgeScans", scans)
+        stats.add("relaxations", pushes - 2)
+        stats.add("heapPushes", pushes)
+        stats.add("heapPops", pops)
+    if meeting is None:
+        return math.inf, None
+
+    path = buildPath(parent[0], meeting)
+    current = parent[1][meeting]
+    while current is not None:
+        path.append(current)
+        current = parent[1][current]
+    return best, path
+
+
+def AStar(G, w, s, t, heuristic):
+    """
+    A* search from s to t
+    :param G: the graph on which the search is performed
+    :param w: a dictionary (x, y) -> cost, every cost must be non-negative
+    :param s: the starting vertex
+    :param t: the end vertex
+    :param heuristic: a function v -> estimated cost from v to t; it must never overestimate the real cost
+        for the returned path to be a lowest cost one
+    :return: the cost of the path found and the path itself, (math.inf, None) if t can't be reached
+    """
+    dist = {s: 0}
+    parent = {s: None}
+    done = set()
+    heap = [(heuristic(s), s)]
+    pops = 0
+    pushes = 1
+    found = False
+    while heap:
+        x = heapq.heappop(heap)[1]
+        pops += 1
+        if x in done:
+            continue
+        if x == t:
+            found = True
+            break
+        done.add(x)
+        for y in G.getOutbound(x):
+            nd = dist[x] + w[(x, y)]
+            if y not in dist or nd < dist[y]:
+                dist[y] = nd
+                parent[y] = x
+                pushes += 1
+                heapq.heappush(heap, (nd + heuristic(y), y))
+
+    stats = instrumentation.active()
+    if stats is not None:
+        _reportHeapSearch(stats, G, done, None, pushes, pops)
+    if found:
+        return dist[t], buildPath(parent, t)
+    return math.inf, None
+
+
+def buildPath(parent, t):
+    """
+    Follows the parent links from t back to the root of the search
+    :param parent: a dictionary containing the parent of each vertex, the root having None
+    :param t: the end vertex, it must be in parent
+    :return: the list of vertices from the root to t
+    """
+    path = []
     current = t
-    res = []
-    while parent[current] is not None:
-        res.append(parent[current])
+    while current is not None:
+        path.append(current)
         current = parent[current]
-    res = res[::-1]
-    print(res)
+    path.reverse()
+    return path
+
+
+# graph -> (version, True if no cost is negative), so the costs are only scanned again once the graph changed
+_nonNegative = weakref.WeakKeyDictionary()
+
+
+def nonNegativeCosts(G):
+    """
+    Tells whether no cost of G is negative, scanning the costs only the first time for every version of G
+    Graphs without getVersion (CSRGraph, GraphSnapshot) can't change, so they are only scanned once
+    """
+    getVersion = getattr(G, "getVersion", None)
+    version = getVersion() if getVersion is not None else 0
+    try:
+        known = _nonNegative.get(G)
+    except TypeError:
+        # the graph can't be referenced weakly, so nothing can be remembered about it
+        return all(c >= 0 for c in G.getCosts().values())
+    if known is not None and known[0] == version:
+        return known[1]
+    result = all(c >= 0 for c in G.getCosts().values())
+    _nonNegative[G] = (version, result)
+    return result
+
+
+def lowestCostPath(G, s, t, algorithm=None):
+    """
+    Given a graph with costs and two vertices, finds a lowest cost walk between the given vertices.
+    Uses Dijkstra's algorithm when no cost is negative and the queue based Ford's algorithm otherwise.
+    :param algorithm: "dijkstra" or "spfa" to skip the check of the costs, None to choose from them
+        (see nonNegativeCosts, the check is only paid once for every version of the graph)
+    :return: the list of vertices from s to t, or None if t can't be reached from s
+        or there are negative cost cycles accessible from s
+    Raises ValueError for an unknown algorithm
+    """
+    if algorithm is None:
+        algorithm = "dijkstra" if nonNegativeCosts(G) else "spfa"
+    costs = G.getCosts()
+    if algorithm == "dijkstra":
+        dist, parent = Dijkstra(G, costs, s, t)
+    elif algorithm == "spfa":
+        dist, parent, cycle = SPFA(G, costs, s)
+    else:
+        raise ValueError("unknown algorithm " + str(algorithm))
+    if t not in parent:
+        return None
+    return buildPath(parent, t)
 
 
 def topologicalSortKahn(g):
@@ -134,7 +431,6 @@ def topologicalSortKahn(g):
         inbound[v] = g.getInDegree(v)
         if inbound[v] == 0:
             s.add(v)
-            sortedList.append(v)
 
     while len(s) > 0:
         x = s.pop()
@@ -143,55 +439,134 @@ def topologicalSortKahn(g):
             inbound[v] -= 1
             if inbound[v] == 0:
                 s.add(v)
+    stats = instrumentation.active()
+    if stats is not None:
+        stats.add("vertexVisits", len(sortedList))
+        stats.add("edgeScans", sum(g.getOutDegree(x) for x in sortedList))
     for e in inbound:
         if inbound[e] != 0:
             return None
     return sortedList
 
 
+def DAGPaths(G, w, s, order=None, longest=False):
+    """
+    Single source lowest (or highest) cost paths in a DAG, relaxing every edge once in topological order
+    :param G: the graph on which the search is performed, it must be a DAG
+    :param w: a dictionary (x, y) -> cost, it is only read
+    :param s: the starting vertex
+    :param order: the vertices of G sorted topologically, computed if not given
+    :param longest: if True the highest cost paths are computed instead
+    :return: a dictionary of distances and a dictionary containing the parent of each vertex,
+        both only hold the vertices reached from s; None if G is not a DAG
+    """
+    if order is None:
+        with instrumentation.phase("topologicalSort"):
+            order = topologicalSortKahn(G)
+        if order is None:
+            return None
+    better = (lambda a, b: a > b) if longest else (lambda a, b: a < b)
+    dist = {s: 0}
+    parent = {s: None}
+    relaxations = 0
+    with instrumentation.phase("relax"):
+        for x in order:
+            if x not in dist:
+                continue
+            d = dist[x]
+            for y in G.getOutbound(x):
+                nd = d + w[(x, y)]
+                if y not in dist or better(nd, dist[y]):
+                    dist[y] = nd
+                    parent[y] = x
+                    relaxations += 1
+
+    stats = instrumentation.active()
+    if stats is not None:
+        stats.add("relaxations", relaxations)
+    return dist, parent
+
+
+def lowestCostPathDAG(G, s, t):
+    """
+    Lowest cost path between two vertices of a DAG in O(V + E)
+    :return: the cost of the path and the list of vertices from s to t,
+        None if G is not a DAG or t can't be reached from s
+    """
+    result = DAGPaths(G, G.getCosts(), s)
+    if result is None or t not in result[0]:
+        return None
+    return result[0][t], buildPath(result[1], t)
+
+
+def highestCostPathDAG(G, s, t):
+    """
+    Highest cost path between two vertices of a DAG in O(V + E)
+    :return: the cost of the path and the list of vertices from s to t,
+        None if G is not a DAG or t can't be reached from s
+    """
+    result = DAGPaths(G, G.getCosts(), s, longest=True)
+    if result is None or t not in result[0]:
+        return None
+    return result[0][t], buildPath(result[1], t)
+
+
 def findHighestCostPath(G, s, t):
     """
-    Negates all the costs of the graph and runs bellman-ford thus giving the highest cost path
-    """
-    if topologicalSortKahn(G) is not None:
-        costs = G.getCosts()
-        for e in costs:
-            costs[e] = -costs[e]
-        res, parent = BellmanFord(G, costs, s)
-        if res == {}:
-            print("not a DAG -> resulting from bellman-ford with negated costs")
-            return
-        if t not in parent:
-            print("can't reach "+str(t)+" from "+str(s))
-            return
-        current = t
-        res = []
-        while parent[current] is not None:
-            res.append(parent[current])
-            current = parent[current]
-        res = res[::-1]
-        print(res)
-    else:
-        print("graph is not a DAG")
+    Finds the highest cost path between two vertices of a DAG, the graph is left unchanged
+    :return: the list of vertices from s to t, None if G is not a DAG or t can't be reached from s
+    """
+    result = highestCostPathDAG(G, s, t)
+    if result is None:
+        return None
+    return result[1]
 
 
-def findHamiltonianCycle(G):
+def criticalPath(G):
     """
-    Find the lowest cost hamiltonian cycle by using the nearest neighbour approach
+    Critical path analysis of a task DAG: vertices are events and the cost of an edge (x, y)
+    is the duration of the activity that can start at x and must be done before y
+    :param G: the graph to be analysed, it must be a DAG
+    :return: the length of the whole schedule, a dictionary with the earliest time of every vertex,
+        a dictionary with the latest time of every vertex that does not delay the schedule,
+        a dictionary with the slack (latest - earliest) of every vertex and a critical path
+        (a longest path, made of zero slack vertices); None if G is not a DAG
+    Raises ValueError if a cost is negative, as no activity can take a negative time
     """
-    visited = []
-    a = list(G.parseX())[0]
-    visited.append(a)
-    costs = G.getCosts()
+    w = G.getCosts()
+    for edge, c in w.items():
+        if c < 0:
+            raise ValueError("negative duration on edge " + str(edge))
+    with instrumentation.phase("topologicalSort"):
+        order = topologicalSortKahn(G)
+    if order is None:
+        return None
 
-    while len(visited) < len(G.parseX()):
-        currLevel = {}
-        for v in G.parseN(a):
-            if v not in visited:
-                currLevel[v] = costs[(a, v)]
-        if currLevel == {}:
-            return None
-        a = min(currLevel, key=currLevel.get)
-        visited.append(a)
+    earliest = {}
+    for x in order:
+        earliest[x] = max((earliest[y] + w[(y, x)] for y in G.getInbound(x)), default=0)
+    length = max(earliest.values(), default=0)
 
-    return visited
+    latest = {}
+    for x in reversed(order):
+        latest[x] = min((latest[y] - w[(x, y)] for y in G.getOutbound(x)), default=length)
+    slack = {x: latest[x] - earliest[x] for x in order}
+
+    path = []
+    current = next((x for x in order if slack[x] == 0 and earliest[x] == 0), None)
+    while current is not None:
+        path.append(current)
+        current = next((y for y in G.getOutbound(current)
+                        if slack[y] == 0 and earliest[current] + w[(current, y)] == earliest[y]), None)
+    return length, earliest, latest, slack, path
+
+
+def findHamiltonianCycle(G, timeBudget=1.0):
+    """
+    Finds a low cost hamiltonian cycle, see tsp.solveTSP
+    :param G: an undirected graph
+    :param timeBudget: the number of seconds the heuristics may use
+    :return: the closed tour (the first vertex repeated at the end) and its total cost,
+        None if no hamiltonian cycle was found
+    """
+    return tsp.solveTSP(G, timeBudget)
@@ -0,0 +1,428 @@
+import math
+from collections.abc import Mapping
+
+# The read-only interface every graph backend offers, so that every algorithm accepts every backend:
+#   getVertices()       mapping vertex -> outbound neighbours, iterating over all the vertices
+#   getVerticesNumber() the number of vertices
+#   vertexExists(v)     True if v is a vertex
+#   edgeExists(x, y)    True if there is an edge from x to y
+#   getOutbound(v), getInbound(v), getOutDegree(v), getInDegree(v)
+#                       the neighbours / degrees of v, None if v is not a vertex
+#   getCost(x, y)       the cost of the edge from x to y, None if there is no such edge
+#   getCosts()          mapping (x, y) -> cost over all the edges
+# Undirected graphs also offer parseX() and parseN(x), and see every edge in both directions.
+PROTOCOL = ("getVertices", "getVerticesNumber", "vertexExists", "edgeExists", "getOutbound", "getInbound",
+            "getOutDegree", "getInDegree", "getCost", "getCosts")
+
+BACKENDS = ("dict", "lists", "csr", "dense")
+
+
+class VerticesView(Mapping):
+    '''
+    Read-only mapping vertex -> outbound neighbours, shaped like the dictionary returned by
+    DirectedGraph.getVertices(), for backends that offer vertices(), vertexExists(v) and getOutbound(v)
+    '''
+
+    def __init__(self, graph):
+        self.__graph = graph
+
+    def __getitem__(self, v):
+        if not self.__graph.vertexExists(v):
+            raise KeyError(v)
+        return self.__graph.getOutbound(v)
+
+    def __contains__(self, v):
+        return self.__graph.vertexExists(v)
+
+    def __iter__(self):
+        return iter(self.__graph.vertices())
+
+    def __len__(self):
+        return self.__graph.getVerticesNumber()
+
+
+class CostView(Mapping):
+    '''
+    Read-only mapping (x, y) -> cost, shaped like the dictionary returned by DirectedGraph.getCosts(),
+    for backends that offer getCost(x, y), edgeExists(x, y), edges() and getEdgesNumber()
+    '''
+
+    def __init__(self, graph):
+        self.__graph = graph
+
+    def __getitem__(self, edge):
+        cost = self.__graph.getCost(edge[0], edge[1])
+        if cost is None:
+            raise KeyError(edge)
+        return cost
+
+    def __contains__(self, edge):
+        try:
+            return self.__graph.vertexExists(edge[0]) and self.__graph.edgeExists(edge[0], edge[1])
+        except (TypeError, IndexError):
+            return False
+
+    def __iter__(self):
+        return self.__graph.edges()
+
+    def __len__(self):
+        return self.__graph.getEdgesNumber()
+
+
+class DenseGraph:
+    '''
+    Mutable directed graph stored as an n x n matrix of costs (None where there is no edge)
+    Vertices are the integers 0..n-1. Edge checks and updates are O(1), listing neighbours is O(n),
+    which suits dense graphs
+    '''
+
+    def __init__(self, n):
+        self.__n = n
+        self.__matrix = [[None] * n for _ in range(n)]
+        self.__edges = 0
+        self.__version = 0
+
+    def getVersion(self):
+        '''
+        Returns a counter increased by every change made to the graph
+        '''
+        return self.__version
+
+    def vertices(self):
+        return range(self.__n)
+
+    def vertexExists(self, v):
+        return type(v) is int and 0 <= v < self.__n
+
+    def edgeExists(self, x, y):
+        return self.vertexExists(x) and self.vertexExists(y) and self.__matrix[x][y] is not None
+
+    def addEdge(self, x, y, cost):
+        if self.__matrix[x][y] is None:
+            self.__matrix[x][y] = cost
+            self.__edges += 1
+            self.__version += 1
+
+    def removeEdge(self, x, y):
+        if self.edgeExists(x, y):
+            self.__matrix[x][y] = None
+            self.__edges -= 1
+            self.__version += 1
+
+    def setCost(self, x, y, newCost):
+        if self.edgeExists(x, y):
+            self.__matrix[x][y] = newCost
+            self.__version += 1
+
+    def getCost(self, x, y):
+        if self.edgeExists(x, y):
+            return self.__matrix[x][y]
+
+    def getCosts(self):
+        return CostView(self)
+
+    def edges(self):
+        for x, row in enumerate(self.__matrix):
+            for y, c in enumerate(row):
+                if c is not None:
+                    yield x, y
+
+    def getEdgesNumber(self):
+        return self.__edges
+
+    def getOutbound(self, v):
+        if self.vertexExists(v):
+            return [y for y, c in enumerate(self.__matrix[v]) if c is not None]
+
+    def getInbound(self, v):
+        if self.vertexExists(v):
+            return [x for x, row in enumerate(self.__matrix) if row[v] is not None]
+
+    def getOutDegree(self, v):
+        if self.vertexExists(v):
+            return self.__n - self.__matrix[v].count(None)
+
+    def getInDegree(self, v):
+        if self.vertexExists(v):
+            return sum(1 for row in self.__matrix if row[v] is not None)
+
+    def getVertices(self):
+        return VerticesView(self)
+
+    def getVerticesNumber(self):
+        return self.__n
+
+
+class ListGraph:
+    '''
+    Mutable directed graph stored as dictionaries vertex -> list of neighbours (one for each direction)
+    and a dictionary (x, y) -> cost. Iterating over neighbours is as cheap as it gets and takes little memory,
+    but removing an edge is O(degree); suits graphs that are built once and then mostly read
+    '''
+
+    def __init__(self):
+        self.__outbound = {}
+        self.__inbound = {}
+        self.__cost = {}
+        self.__version = 0
+
+    def getVersion(self):
+        '''
+        Returns a counter increased by every change made to the graph
+        '''
+        return self.__version
+
+    def addVertex(self, v):
+        if v not in self.__outbound:
+            self.__outbound[v] = []
+            self.__inbound[v] = []
+            self.__version += 1
+
+    def vertexExists(self, v):
+        try:
+            return v in self.__outbound
+        except TypeError:
+            return False
+
+    def edgeExists(self, x, y):
+        try:
+            return (x, y) in self.__cost
+        except TypeError:
+            return False
+
+    def addEdge(self, x, y, cost):
+        self.addVertex(x)
+        self.addVertex(y)
+        if (x, y) not in self.__cost:
+            self.__outbound[x].append(y)
+            self.__inbound[y].append(x)
+            self.__cost[(x, y)] = cost
+            self.__version += 1
+
+    def removeEdge(self, x, y):
+        if self.edgeExists(x, y):
+            self.__outbound[x].remove(y)
+            self.__inbound[y].remove(x)
+            del self.__cost[(x, y)]
+            self.__version += 1
+
+    def setCost(self, x, y, newCost):
+        if self.edgeExists(x, y):
+            self.__cost[(x, y)] = newCost
+            self.__version += 1
+
+    def getCost(self, x, y):
+        if self.edgeExists(x, y):
+            return self.__cost[(x, y)]
+
+    def getCosts(self):
+        return self.__cost
+
+    def getOutbound(self, v):
+        if self.vertexExists(v):
+            return self.__outbound[v]
+
+    def getInbound(self, v):
+        if self.vertexExists(v):
+            return self.__inbound[v]
+
+    def getOutDegree(self, v):
+        if self.vertexExists(v):
+            return len(self.__outbound[v])
+
+    def getInDegree(self, v):
+        if self.vertexExists(v):
+            return len(self.__inbound[v])
+
+    def getVertices(self):
+        return self.__outbound
+
+    def getVerticesNumber(self):
+        return len(self.__outbound)
+
+
+class UndirectedView:
+    '''
+    Read-only undirected view of a directed graph: x and y are neighbours if there is an edge between
+    them in either direction, and the cost is the lowest of the two
+    Offers the undirected interface (parseX, parseN) as well as the common protocol
+    '''
+
+    def __init__(self, G):
+        self.__graph = G
+        self.__costs = None
+
+    def parseX(self):
+        return self.__graph.getVertices().keys()
+
+    def parseN(self, x):
+        if not self.__graph.vertexExists(x):
+            return None
+        return list(dict.fromkeys(list(self.__graph.getOutbound(x)) + list(self.__graph.getInbound(x))))
+
+    def isEdge(self, x, y):
+        return self.__graph.edgeExists(x, y) or self.__graph.edgeExists(y, x)
+
+    def vertices(self):
+        return self.parseX()
+
+    def vertexExists(self, v):
+        return self.__graph.vertexExists(v)
+
+    def edgeExists(self, x, y):
+        return self.vertexExists(x) and self.vertexExists(y) and self.isEdge(x, y)
+
+    def getCost(self, x, y):
+        if self.edgeExists(x, y):
+            return self.getCosts()[(x, y)]
+
+    def getCosts(self):
+        '''
+        Returns a dictionary (x, y) -> cost holding both directions of every edge, built on the first call
+        '''
+        if self.__costs is None:
+            costs = {}
+            for (x, y), c in self.__graph.getCosts().items():
+                if c < costs.get((x, y), math.inf):
+                    costs[(x, y)] = c
+                    costs[(y, x)] = c
+            self.__costs = costs
+        return self.__costs
+
+    def getOutbound(self, v):
+        return self.parseN(v)
+
+    def getInbound(self, v):
+        return self.parseN(v)
+
+    def getOutDegree(self, v):
+        neighbours = self.parseN(v)
+        if neighbours is not None:
+            return len(neighbours)
+
+    def getInDegree(self, v):
+        return self.getOutDegree(v)
+
+    def getVertices(self):
+        return VerticesView(self)
+
+    def getVerticesNumber(self):
+        return self.__graph.getVerticesNumber()
+
+
+class ParseView:
+    '''
+    Adapts a graph with the parseX / parseNout / parseNin / isEdge / getCost(x, y) interface
+    (like v2.Graph) to the common protocol
+    '''
+
+    def __init__(self, G):
+        self.__graph = G
+
+    def vertices(self):
+        return self.__graph.parseX()
+
+    def vertexExists(self, v):
+        return self.__graph.isVertex(v)
+
+    def edgeExists(self, x, y):
+        return self.vertexExists(x) and self.vertexExists(y) and self.__graph.isEdge(x, y)
+
+    def getCost(self, x, y):
+        if self.edgeExists(x, y):
+            return self.__graph.getCost(x, y)
+
+    def getCosts(self):
+        return CostView(self)
+
+    def edges(self):
+        for x in self.__graph.parseX():
+            for y in self.__graph.parseNout(x):
+                yield x, y
+
+    def getEdgesNumber(self):
+        return sum(self.__graph.getOutDegree(x) for x in self.__graph.parseX())
+
+    def getOutbound(self, v):
+        if self.vertexExists(v):
+            return self.__graph.parseNout(v)
+
+    def getInbound(self, v):
+        if self.vertexExists(v):
+            return self.__graph.parseNin(v)
+
+    def getOutDegree(self, v):
+        if self.vertexExists(v):
+            return self.__graph.getOutDegree(v)
+
+    def getInDegree(self, v):
+        if self.vertexExists(v):
+            return self.__graph.getInDegree(v)
+
+    def getVertices(self):
+        return VerticesView(self)
+
+    def getVerticesNumber(self):
+        return len(self.__graph.parseX())
+
+
+def toBackend(G, backend):
+    '''
+    Copies any graph offering the common protocol into the given storage backend
+    :param G: the graph to be copied; for "csr" and "dense" its vertices must be the integers 0..n-1
+    :param backend: "dict" (DirectedGraph: insertion ordered neighbour dictionaries, mutable),
+        "lists" (ListGraph: neighbour lists, mutable), "csr" (CSRGraph: compact arrays, immutable)
+        or "dense" (DenseGraph: cost matrix, mutable)
+    :return: the new graph
+    Raises ValueError for an unknown backend
+    '''
+    from csrGraph import CSRGraph
+    from graph import DirectedGraph
+
+    if backend == "csr":
+        return CSRGraph.fromDirectedGraph(G)
+    if backend == "dense":
+        result = DenseGraph(G.getVerticesNumber())
+    elif backend in ("dict", "lists"):
+        result = DirectedGraph(None) if backend == "dict" else ListGraph()
+        for v in G.getVertices():
+            result.addVertex(v)
+    else:
+        raise ValueError("unknown backend " + str(backend))
+    for (x, y), c in G.getCosts().items():
+        result.addEdge(x, y, c)
+    return result
+
+
+def checkConformance(G, reference):
+    '''
+    Compares every query of the common protocol on G against a reference graph with the same content
+    :return: the list of mismatches found, as readable strings; empty if G conforms
+    '''
+    problems = []
+    missing = [name for name in PROTOCOL if not hasattr(G, name)]
+    if missing:
+        return ["missing methods: " + ", ".join(missing)]
+    if G.getVerticesNumber() != reference.getVerticesNumber():
+        problems.append("getVerticesNumber")
+    if sorted(G.getVertices()) != sorted(reference.getVertices()):
+        problems.append("getVertices")
+    if dict(G.getCosts()) != dict(reference.getCosts()):
+        problems.append("getCosts")
+    for v in reference.getVertices():
+        if not G.vertexExists(v):
+            problems.append("vertexExists(%r)" % (v,))
+            continue
+        for name in ("getOutbound", "getInbound"):
+            if sorted(getattr(G, name)(v)) != sorted(getattr(reference, name)(v)):
+                problems.append("%s(%r)" % (name, v))
+        for name in ("getOutDegree", "getInDegree"):
+            if getattr(G, name)(v) != getattr(reference, name)(v):
+                problems.append("%s(%r)" % (name, v))
+        for y in reference.getOutbound(v):
+            if not G.edgeExists(v, y) or G.getCost(v, y) != reference.getCost(v, y):
+                problems.append("edge (%r, %r)" % (v, y))
+    absent = object()
+    if G.vertexExists(absent) or G.getOutbound(absent) is not None:
+        problems.append("unknown vertex")
+    return problems
@@ -0,0 +1,99 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+# the Stats collecting counts right now, None when instrumentation is off
+_current = None
+
+
+class Stats:
+    '''
+    Counters and per-phase timings collected while instrumentation is on
+    Counters used by the algorithms: vertexVisits, edgeScans, relaxations, heapPushes, heapPops, iterations
+    (rounds of BellmanFord, levels of frontierBFS, starts of the nearest neighbour heuristic...), moves (local search
+    improvements) and bottomUpLevels (levels frontierBFS ran bottom-up)
+    '''
+
+    def __init__(self):
+        self.counters = {}
+        self.phases = {}
+
+    def add(self, counter, n=1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def addTime(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+    def asDict(self):
+        return {"counters": dict(self.counters), "phases": dict(self.phases)}
+
+    def __str__(self):
+        lines = ["%s: %d" % item for item in sorted(self.counters.items())]
+        lines.extend("%s: %.6fs" % item for item in sorted(self.phases.items()))
+        return "\n".join(lines)
+
+
+@contextmanager
+def instrument(callback=None):
+    '''
+    Turns instrumentation on for the algorithms run inside the with block
+        with instrument() as stats:
+            BellmanFord(G, G.getCosts(), 0)
+        print(stats)
+    :param callback: if given, called with the Stats when the block ends
+    :return: yields the Stats being filled
+    '''
+    global _current
+    previous = _current
+    stats = Stats()
+    _current = stats
+    try:
+        yield stats
+    finally:
+        _current = previous
+        if callback is not None:
+            callback(stats)
+
+
+def active():
+    '''
+    Returns the Stats being filled, None when instrumentation is off
+    The algorithms keep their counts in local variables and only report them here once, when they end,
+    so nothing is paid in their inner loops when instrumentation is off
+    '''
+    return _current
+
+
+def count(counter, n=1):
+    if _current is not None:
+        _current.add(counter, n)
+
+
+class _Phase:
+    '''
+    Adds the time spent in the with block to a phase of the given Stats
+    '''
+
+    def __init__(self, stats, name):
+        self.__stats = stats
+        self.__name = name
+        self.__start = None
+
+    def __enter__(self):
+        self.__start = time.perf_counter()
+
+    def __exit__(self, *exception):
+        self.__stats.addTime(self.__name, time.perf_counter() - self.__start)
+        return False
+
+
+# shared by every phase entered while instrumentation is off, so that nothing is created or timed then
+_NO_PHASE = nullcontext()
+
+
+def phase(name):
+    '''
+    Times the with block as the given phase (load, topologicalSort, relax...) when instrumentation is on
+    '''
+    if _current is None:
+        return _NO_PHASE
+    return _Phase(_current, name)
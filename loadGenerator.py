@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import queryService
+
+
+async def runClient(host, port, requests, concurrency, vertices, hotSources, seed=0):
+    '''
+    Sends requests to a query service over one connection, at most concurrency of them waiting at a time
+    Sources are drawn from a small hot set, so that concurrent requests share sources and get merged
+    :return: the sorted list of latencies in seconds, the total time and the number of error responses
+    '''
+    rnd = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    hot = [rnd.randrange(vertices) for _ in range(hotSources)]
+    waiting = {}
+    latencies = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def receive():
+        nonlocal errors
+        for _ in range(requests):
+            response = json.loads(await reader.readline())
+            started = waiting.pop(response["id"])
+            latencies.append(time.perf_counter() - started)
+            errors += "error" in response
+            slots.release()
+
+    receiver = asyncio.ensure_future(receive())
+    start = time.perf_counter()
+    for i in range(requests):
+        await slots.acquire()
+        op = rnd.choice(("path", "path", "distance", "reachable", "degree", "topk"))
+        request = {"id": i, "op": op, "source": rnd.choice(hot), "target": rnd.randrange(vertices),
+                   "vertex": rnd.randrange(vertices), "k": 5}
+        waiting[i] = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+    await receiver
+    elapsed = time.perf_counter() - start
+    writer.close()
+    await writer.wait_closed()
+    latencies.sort()
+    return latencies, elapsed, errors
+
+
+async def run(args):
+    server = None
+    service = None
+    host, port = args.host, args.port
+    if port is None:
+        # no service given: start one in this process, on a free port
+        service = queryService.QueryService(queryService.loadGraph(args.graph), args.processes)
+        server = await queryService.serveSocket(service, host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        latencies, elapsed, errors = await runClient(host, port, args.requests, args.concurrency,
+                                                     args.vertices, args.hot, args.seed)
+        print("%d requests in %.3fs: %.0f requests/s, %d errors" % (len(latencies), elapsed,
+                                                                     len(latencies) / elapsed, errors))
+        print("latency p50 %.2f ms, p99 %.2f ms, max %.2f ms" % (
+            latencies[len(latencies) // 2] * 1000, latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+            latencies[-1] * 1000))
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b'{"op": "stats"}\n')
+        print(json.dumps(json.loads(await reader.readline())["stats"], indent=2))
+        writer.close()
+        await writer.wait_closed()
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for queryService")
+    parser.add_argument("--graph", default="1k.txt", help="graph of the service started when --port is not given")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="port of a running service")
+    parser.add_argument("--processes", type=int, help="worker processes of the service started here")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--vertices", type=int, default=1000, help="vertices are drawn from 0..VERTICES-1")
+    parser.add_argument("--hot", type=int, default=20, help="number of distinct sources used")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import math
+import sys
+from collections import OrderedDict
+
+import graphAlgorithms
+
+ALGORITHMS = ("lowest", "dijkstra", "spfa", "bfs")
+
+
+class PathCache:
+    '''
+    Memoizes single source searches on a graph, so that repeated path queries from the same source
+    only look up the stored tree
+    Entries are keyed on (algorithm, source) and evicted least recently used first once there are more
+    than maxEntries of them or they take more than maxBytes. Every result is tied to the version of the graph
+    it was computed on (see DirectedGraph.getVersion): the first query after the graph changed drops
+    every entry. Graphs without getVersion (CSRGraph, GraphSnapshot) can't change, so their entries never expire
+    '''
+
+    def __init__(self, G, maxEntries=128, maxBytes=None):
+        '''
+        :param G: the graph the queries are made on
+        :param maxEntries: the largest number of single source results kept, None for no limit
+        :param maxBytes: the largest approximate size of the results kept, None for no limit
+        '''
+        self.__graph = G
+        self.__maxEntries = maxEntries
+        self.__maxBytes = maxBytes
+        # (algorithm, source) -> (result, size), least recently used first
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__version = self.__graphVersion()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+
+    def __graphVersion(self):
+        getVersion = getattr(self.__graph, "getVersion", None)
+        return getVersion() if getVersion is not None else 0
+
+    def __compute(self, algorithm, s):
+        G = self.__graph
+        if algorithm == "bfs":
+            return graphAlgorithms.BFS(G, s)
+        costs = G.getCosts()
+        if algorithm == "lowest":
+            algorithm = "dijkstra" if graphAlgorithms.nonNegativeCosts(G) else "spfa"
+        if algorithm == "dijkstra":
+            return graphAlgorithms.Dijkstra(G, costs, s)
+        dist, parent, cycle = graphAlgorithms.SPFA(G, costs, s)
+        return dist, parent
+
+    def singleSource(self, s, algorithm="lowest"):
+        '''
+        Returns the result of a single source search from s, computing it only if it is not cached
+        :param algorithm: "dijkstra" (no cost may be negative), "spfa", "bfs" (number of edges) or
+            "lowest", which picks Dijkstra when no cost is negative and SPFA otherwise, like lowestCostPath
+        :return: a dictionary of distances and a dictionary containing the parent of each reached vertex,
+            both empty if a negative cost cycle is accessible from s; they are shared with the cache
+            and must not be changed
+        Raises ValueError for an unknown algorithm
+        '''
+        if algorithm not in ALGORITHMS:
+            raise ValueError("unknown algorithm " + str(algorithm))
+        version = self.__graphVersion()
+        if version != self.__version:
+            self.__invalidations += len(self.__entries)
+            self.__entries.clear()
+            self.__bytes = 0
+            self.__version = version
+
+        key = (algorithm, s)
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return entry[0]
+        self.__misses += 1
+        result = self.__compute(algorithm, s)
+        size = sys.getsizeof(result[0]) + sys.getsizeof(result[1])
+        self.__entries[key] = (result, size)
+        self.__bytes += size
+        self.__evict()
+        return result
+
+    def __evict(self):
+        entries = self.__entries
+        while entries and ((self.__maxEntries is not None and len(entries) > self.__maxEntries)
+                           or (self.__maxBytes is not None and self.__bytes > self.__maxBytes)):
+            result, size = entries.popitem(last=False)[1]
+            self.__bytes -= size
+            self.__evictions += 1
+
+    def lowestCostPath(self, s, t):
+        '''
+        Same result as graphAlgorithms.lowestCostPath(G, s, t), reusing the cached tree of s
+        :return: the list of vertices from s to t, or None if t can't be reached from s
+            or there are negative cost cycles accessible from s
+        '''
+        parent = self.singleSource(s, "lowest")[1]
+        if t not in parent:
+            return None
+        return graphAlgorithms.buildPath(parent, t)
+
+    def shortestPath(self, s, t):
+        '''
+        A path with the fewest edges from s to t, like graphAlgorithms.shortestPathReverseBFS,
+        reusing the cached BFS tree of s
+        :return: the list of vertices from s to t, None if t can't be reached from s
+        '''
+        parent = self.singleSource(s, "bfs")[1]
+        if t not in parent:
+            return None
+        return graphAlgorithms.buildPath(parent, t)
+
+    def distance(self, s, t, algorithm="lowest"):
+        '''
+        Returns the distance from s to t found by the given algorithm, math.inf if t can't be reached
+        '''
+        return self.singleSource(s, algorithm)[0].get(t, math.inf)
+
+    def clear(self):
+        self.__entries.clear()
+        self.__bytes = 0
+
+    def getStats(self):
+        '''
+        Returns a dictionary with the number of hits, misses, evictions (entries dropped to make room),
+        invalidations (entries dropped because the graph changed), the current number of entries and their size
+        '''
+        return {"hits": self.__hits, "misses": self.__misses, "evictions": self.__evictions,
+                "invalidations": self.__invalidations, "entries": len(self.__entries), "bytes": self.__bytes}
@@ -0,0 +1,285 @@
+import heapq
+import math
+import pickle
+import random
+import struct
+import sys
+import time
+from array import array
+
+import components
+
+INDEX_MAGIC = b"GRAPHIDX"
+INDEX_VERSION = 1
+
+_INDEX_HEADER = struct.Struct("<8sI")
+
+
+def _sizeOf(*objects):
+    '''
+    Approximate memory used by containers of numbers: the containers themselves and what they hold,
+    one level down (the numbers in them are small and mostly shared)
+    '''
+    total = 0
+    for o in objects:
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            total += sum(sys.getsizeof(v) for v in o.values() if isinstance(v, (dict, list, array)))
+        elif isinstance(o, list):
+            total += sum(sys.getsizeof(v) for v in o if isinstance(v, (dict, list, array)))
+    return total
+
+
+class _QueryIndex:
+    '''
+    Build report and persistence shared by the indices
+    '''
+
+    def __init__(self):
+        self._buildSeconds = 0
+
+    def _state(self):
+        return self.__dict__
+
+    def _memory(self):
+        return 0
+
+    def getStats(self):
+        '''
+        Returns a dictionary with the time taken to build the index (buildSeconds), its approximate
+        size in memory (bytes) and index specific counts
+        '''
+        return {"buildSeconds": self._buildSeconds, "bytes": self._memory()}
+
+    def save(self, path):
+        '''
+        Writes the index to a file, so that it can be opened again with load() without rebuilding it
+        '''
+        with open(path, "wb") as f:
+            f.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION))
+            pickle.dump((type(self).__name__, self._state()), f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Opens an index written by save()
+        Raises ValueError if the file is not an index of this kind
+        '''
+        with open(path, "rb") as f:
+            header = f.read(_INDEX_HEADER.size)
+            if len(header) < _INDEX_HEADER.size:
+                raise ValueError("not a query index: " + str(path))
+            magic, version = _INDEX_HEADER.unpack(header)
+            if magic != INDEX_MAGIC:
+                raise ValueError("not a query index: " + str(path))
+            if version != INDEX_VERSION:
+                raise ValueError("unsupported query index version " + str(version))
+            name, state = pickle.load(f)
+        if name != cls.__name__:
+            raise ValueError("the file holds a " + name + ", not a " + cls.__name__)
+        index = cls.__new__(cls)
+        index.__dict__.update(state)
+        return index
+
+
+class ReachabilityIndex(_QueryIndex):
+    '''
+    Answers "can x reach y" queries on a graph that does not change
+    The graph is reduced to the DAG of its strongly connected components (see components.tarjan) and
+    every component gets GRAIL interval labels: for each of a few random depth-first traversals of the DAG,
+    the interval [lowest postorder number below it, its own postorder number]. If x reaches y, the intervals
+    of y are inside those of x, so most negative queries end after comparing a few numbers; the others
+    are settled by a depth-first search of the DAG which skips the components whose labels rule them out
+    Building takes O(k (V + E)) for k labels
+    '''
+
+    def __init__(self, G, labels=3, seed=0):
+        '''
+        :param G: the graph, later changes to it are not seen by the index
+        :param labels: the number of random interval labels per component
+        :param seed: the seed of the random traversal orders
+        '''
+        super().__init__()
+        start = time.perf_counter()
+        count, component = components.tarjan(G)
+        successors = [set() for _ in range(count)]
+        for x in G.getVertices():
+            cx = component[x]
+            for y in G.getOutbound(x):
+                if component[y] != cx:
+                    successors[cx].add(component[y])
+        self._component = component
+        # the DAG in compressed rows: the successors of c are targets[offsets[c]:offsets[c + 1]]
+        self._offsets = array('q', [0])
+        self._targets = array('i')
+        for s in successors:
+            self._targets.extend(sorted(s))
+            self._offsets.append(len(self._targets))
+        rnd = random.Random(seed)
+        self._labels = [self.__traversalLabels(count, rnd) for _ in range(labels)]
+        self._buildSeconds = time.perf_counter() - start
+
+    def __traversalLabels(self, count, rnd):
+        '''
+        Runs a depth-first traversal of the DAG in random order
+        :return: the arrays low and post, giving the interval of every component
+        '''
+        low = array('i', [-1]) * count
+        post = array('i', [-1]) * count
+        roots = list(range(count))
+        rnd.shuffle(roots)
+        rank = 0
+        for root in roots:
+            if low[root] != -1:
+                continue
+            low[root] = count
+            stack = [(root, self.__shuffled(root, rnd))]
+            while stack:
+                c, children = stack[-1]
+                if children:
+                    d = children.pop()
+                    if low[d] == -1:
+                        low[d] = count
+                        stack.append((d, self.__shuffled(d, rnd)))
+                    elif post[d] != -1 and low[d] < low[c]:
+                        low[c] = low[d]
+                    continue
+                stack.pop()
+                post[c] = rank
+                if rank < low[c]:
+                    low[c] = rank
+                rank += 1
+                if stack and low[c] < low[stack[-1][0]]:
+                    low[stack[-1][0]] = low[c]
+        return low, post
+
+    def __shuffled(self, c, rnd):
+        children = list(self._targets[self._offsets[c]:self._offsets[c + 1]])
+        rnd.shuffle(children)
+        return children
+
+    def __mayReach(self, a, b):
+        for low, post in self._labels:
+            if low[b] < low[a] or post[b] > post[a]:
+                return False
+        return True
+
+    def reachable(self, x, y):
+        '''
+        Returns True if there is a path from x to y (always the case when x == y)
+        '''
+        a = self._component[x]
+        b = self._component[y]
+        if a == b:
+            return True
+        # component ids follow a topological order of the DAG
+        if a > b or not self.__mayReach(a, b):
+            return False
+        offsets = self._offsets
+        targets = self._targets
+        seen = {a}
+        stack = [a]
+        while stack:
+            c = stack.pop()
+            for i in range(offsets[c], offsets[c + 1]):
+                d = targets[i]
+                if d == b:
+                    return True
+                if d < b and d not in seen and self.__mayReach(d, b):
+                    seen.add(d)
+                    stack.append(d)
+        return False
+
+    def _memory(self):
+        return _sizeOf(self._component, self._offsets, self._targets, *[a for label in self._labels for a in label])
+
+    def getStats(self):
+        stats = super().getStats()
+        stats["components"] = len(self._offsets) - 1
+        stats["dagEdges"] = len(self._targets)
+        stats["labels"] = len(self._labels)
+        return stats
+
+
+class DistanceIndex(_QueryIndex):
+    '''
+    Answers "how far is x from y" queries on a graph that does not change, with pruned landmark labeling:
+    every vertex gets the list of its distances to and from a few landmarks, chosen so that for every pair x, y
+    some landmark on a lowest cost path from x to y is in both lists (a 2-hop cover). A query is then the
+    lowest sum over the landmarks common to the out-label of x and the in-label of y
+    The vertices are taken as landmarks from the highest degree down, and each one runs Dijkstra forward and
+    backward, pruned wherever the labels built so far already give the right distance, so on graphs with hubs
+    the labels stay small; on uniformly random graphs they grow with the graph (about 70 entries per vertex
+    for 1k.txt), and so does the build time. The costs must be non-negative
+    '''
+
+    def __init__(self, G, weighted=True):
+        '''
+        :param G: the graph, later changes to it are not seen by the index
+        :param weighted: if False every edge counts 1, giving the number of edges like BFS
+        '''
+        super().__init__()
+        start = time.perf_counter()
+        vertices = sorted(G.getVertices(), key=lambda v: -(G.getOutDegree(v) + G.getInDegree(v)))
+        self._position = {v: i for i, v in enumerate(vertices)}
+        # labelOut[v][rank]: distance from v to the landmark of that rank, labelIn[v][rank]: from it to v
+        self._labelOut = [{} for _ in vertices]
+        self._labelIn = [{} for _ in vertices]
+        costs = G.getCosts()
+        if weighted:
+            forward = lambda x, y: costs[(x, y)]
+            backward = lambda x, y: costs[(y, x)]
+        else:
+            forward = backward = lambda x, y: 1
+        for rank, v in enumerate(vertices):
+            self.__prunedDijkstra(G.getOutbound, forward, rank, v, self._labelIn, True)
+            self.__prunedDijkstra(G.getInbound, backward, rank, v, self._labelOut, False)
+        self._buildSeconds = time.perf_counter() - start
+
+    def __prunedDijkstra(self, neighbours, cost, rank, landmark, labels, forward):
+        position = self._position
+        own = self._labelOut[rank] if forward else self._labelIn[rank]
+        dist = {landmark: 0}
+        heap = [(0, landmark)]
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            px = position[x]
+            other = self._labelIn[px] if forward else self._labelOut[px]
+            if _join(own, other) <= d:
+                continue
+            labels[px][rank] = d
+            for y in neighbours(x):
+                nd = d + cost(x, y)
+                if nd < dist.get(y, math.inf):
+                    dist[y] = nd
+                    heapq.heappush(heap, (nd, y))
+
+    def distance(self, x, y):
+        '''
+        Returns the lowest cost of a path from x to y, math.inf if y can't be reached from x
+        '''
+        return _join(self._labelOut[self._position[x]], self._labelIn[self._position[y]])
+
+    def reachable(self, x, y):
+        return self.distance(x, y) < math.inf
+
+    def _memory(self):
+        return _sizeOf(self._position, self._labelOut, self._labelIn)
+
+    def getStats(self):
+        stats = super().getStats()
+        entries = sum(map(len, self._labelOut)) + sum(map(len, self._labelIn))
+        stats["labelEntries"] = entries
+        stats["averageLabel"] = entries / max(1, 2 * len(self._labelOut))
+        return stats
+
+
+def _join(out, into):
+    '''
+    Returns the lowest out[rank] + into[rank] over the landmarks in both labels, math.inf if there is none
+    '''
+    if len(into) < len(out):
+        return min((d + out[r] for r, d in into.items() if r in out), default=math.inf)
+    return min((d + into[r] for r, d in out.items() if r in into), default=math.inf)
@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import graphAlgorithms
+from csrGraph import CSRGraph
+from graph import DirectedGraph
+
+OPERATIONS = ("path", "distance", "reachable", "degree", "topk", "stats")
+
+# state of a worker process, set once by _initWorker so the graph is not sent again with every request
+_graph = None
+
+
+def _initWorker(graph):
+    global _graph
+    _graph = graph
+
+
+def _singleSource(algorithm, s):
+    '''
+    Runs a single source search in a worker process
+    :return: the dictionaries of distances and parents
+    '''
+    G = _graph
+    if algorithm == "bfs":
+        return graphAlgorithms.BFS(G, s)
+    if algorithm == "dijkstra":
+        return graphAlgorithms.Dijkstra(G, G.getCosts(), s)
+    dist, parent, cycle = graphAlgorithms.SPFA(G, G.getCosts(), s)
+    return dist, parent
+
+
+class QueryService:
+    '''
+    Answers JSON queries on one graph loaded once, see handle for the requests
+    Path queries need a single source search: concurrent requests for the same source wait on the same run,
+    the runs go to a process pool so the event loop keeps serving, and the last results are kept in an LRU
+    '''
+
+    def __init__(self, G, processes=None, cacheEntries=64):
+        '''
+        :param G: the graph, it must not be changed while the service runs
+        :param processes: the number of worker processes, os.cpu_count() if None;
+            0 runs the searches in the event loop thread, which blocks it
+        :param cacheEntries: the number of single source results kept
+        '''
+        self.__graph = G
+        self.__lowest = "dijkstra" if all(c >= 0 for c in G.getCosts().values()) else "spfa"
+        self.__pool = None
+        if processes != 0:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            self.__pool = ProcessPoolExecutor(processes, context, initializer=_initWorker, initargs=(G,))
+        _initWorker(G)
+        self.__cacheEntries = cacheEntries
+        self.__results = OrderedDict()
+        self.__running = {}
+        self.__byOutDegree = None
+        self.__byInDegree = None
+
+        self.__started = time.perf_counter()
+        self.__requests = {op: 0 for op in OPERATIONS}
+        self.__errors = 0
+        self.__runs = 0
+        self.__merged = 0
+        self.__cacheHits = 0
+        self.__latencyTotal = 0
+        self.__latencyMax = 0
+        self.__latencies = deque(maxlen=1000)
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.shutdown()
+
+    async def __search(self, algorithm, s):
+        '''
+        Returns the result of a single source search, from the cache, from a run already going on
+        for the same source, or from a new run in the pool
+        '''
+        key = (algorithm, s)
+        result = self.__results.get(key)
+        if result is not None:
+            self.__cacheHits += 1
+            self.__results.move_to_end(key)
+            return result
+        running = self.__running.get(key)
+        if running is not None:
+            self.__merged += 1
+            return await asyncio.shield(running)
+
+        self.__runs += 1
+        if self.__pool is None:
+            running = asyncio.get_running_loop().create_future()
+            running.set_result(_singleSource(algorithm, s))
+        else:
+            running = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(
+                self.__pool, _singleSource, algorithm, s))
+        self.__running[key] = running
+        try:
+            result = await asyncio.shield(running)
+        finally:
+            del self.__running[key]
+        self.__results[key] = result
+        if len(self.__results) > self.__cacheEntries:
+            self.__results.popitem(last=False)
+        return result
+
+    def __topk(self, k, direction):
+        if direction not in ("in", "out"):
+            raise ValueError("direction must be \"in\" or \"out\"")
+        if self.__byOutDegree is None:
+            G = self.__graph
+            self.__byOutDegree = sorted(G.getVertices(), key=lambda v: -G.getOutDegree(v))
+            self.__byInDegree = sorted(G.getVertices(), key=lambda v: -G.getInDegree(v))
+        vertices = self.__byInDegree if direction == "in" else self.__byOutDegree
+        degree = self.__graph.getInDegree if direction == "in" else self.__graph.getOutDegree
+        return [[v, degree(v)] for v in vertices[:k]]
+
+    def __vertex(self, request, name):
+        v = request.get(name)
+        try:
+            exists = self.__graph.vertexExists(v)
+        except TypeError:
+            exists = False
+        if not exists:
+            raise ValueError("unknown vertex " + json.dumps(v))
+        return v
+
+    async def handle(self, request):
+        '''
+        Answers one request, a dictionary with an "op" and its arguments, echoing its "id" if it has one:
+            {"op": "path", "source": s, "target": t}        lowest cost path: {"path": [...], "cost": c}
+            {"op": "distance", "source": s, "target": t}    {"cost": c}, null if t can't be reached
+            {"op": "reachable", "source": s, "target": t}   {"reachable": true / false, "edges": fewest edges}
+            {"op": "degree", "vertex": v}                   {"in": d, "out": d}
+            {"op": "topk", "k": 10, "direction": "out"}     {"vertices": [[v, degree], ...]}
+            {"op": "stats"}                                 the counters, see getStats
+        :return: the response dictionary, with an "error" instead of the answer for a bad request
+        '''
+        start = time.perf_counter()
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        try:
+            op = request.get("op") if isinstance(request, dict) else None
+            if op not in OPERATIONS:
+                raise ValueError("unknown op " + json.dumps(op))
+            self.__requests[op] += 1
+            if op in ("path", "distance", "reachable"):
+                s = self.__vertex(request, "source")
+                t = self.__vertex(request, "target")
+                algorithm = "bfs" if op == "reachable" else self.__lowest
+                dist, parent = await self.__search(algorithm, s)
+                if op == "reachable":
+                    response["reachable"] = t in dist
+                    response["edges"] = dist.get(t)
+                else:
+                    response["cost"] = dist.get(t) if dist.get(t, math.inf) < math.inf else None
+                    if op == "path":
+                        response["path"] = graphAlgorithms.buildPath(parent, t) if t in parent else None
+            elif op == "degree":
+                v = self.__vertex(request, "vertex")
+                response["in"] = self.__graph.getInDegree(v)
+                response["out"] = self.__graph.getOutDegree(v)
+            elif op == "topk":
+                k = request.get("k", 10)
+                if type(k) is not int or k < 0:
+                    raise ValueError("k must be a non-negative integer")
+                response["vertices"] = self.__topk(k, request.get("direction", "out"))
+            else:
+                response["stats"] = self.getStats()
+        except ValueError as e:
+            self.__errors += 1
+            response["error"] = str(e)
+        except Exception as e:
+            # a failed search (a broken pool, a backend error...) must still be answered, or the client waits forever
+            self.__errors += 1
+            response["error"] = "internal error: " + type(e).__name__ + ": " + str(e)
+        elapsed = time.perf_counter() - start
+        self.__latencyTotal += elapsed
+        self.__latencyMax = max(self.__latencyMax, elapsed)
+        self.__latencies.append(elapsed)
+        return response
+
+    async def handleLine(self, line):
+        '''
+        Answers one JSON line with one JSON line
+        '''
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.__errors += 1
+            return json.dumps({"id": None, "error": "malformed JSON"})
+        return json.dumps(await self.handle(request))
+
+    def getStats(self):
+        '''
+        Returns the counters: requests per op, errors, single source runs, requests merged into a run
+        already going on, cache hits, throughput (requests per second since the start) and latencies
+        in seconds (mean, max and the median and 99th percentile of the last 1000 requests)
+        '''
+        total = sum(self.__requests.values())
+        recent = sorted(self.__latencies)
+        uptime = time.perf_counter() - self.__started
+        return {"requests": dict(self.__requests), "errors": self.__errors, "runs": self.__runs,
+                "merged": self.__merged, "cacheHits": self.__cacheHits,
+                "throughput": total / uptime if uptime > 0 else None,
+                "latency": {"mean": self.__latencyTotal / total if total else None, "max": self.__latencyMax,
+                            "p50": recent[len(recent) // 2] if recent else None,
+                            "p99": recent[min(len(recent) - 1, int(0.99 * len(recent)))] if recent else None}}
+
+
+async def _serveStream(service, readline, send):
+    '''
+    Answers JSON lines as they complete, so a slow query does not hold back the others;
+    the responses carry the id of their request
+    :param readline: a coroutine function returning the next line as bytes, b"" at the end
+    :param send: a coroutine function writing one line
+    '''
+    lock = asyncio.Lock()
+    tasks = set()
+
+    async def answer(line):
+        response = await service.handleLine(line)
+        async with lock:
+            await send(response.encode() + b"\n")
+
+    while True:
+        line = await readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        task = asyncio.ensure_future(answer(line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+async def serveSocket(service, host="127.0.0.1", port=8765):
+    '''
+    Serves JSON lines over TCP until cancelled, every connection being answered concurrently
+    :return: the asyncio server, already listening
+    '''
+    async def connection(reader, writer):
+        async def send(data):
+            writer.write(data)
+            await writer.drain()
+
+        try:
+            await _serveStream(service, reader.readline, send)
+        except (asyncio.CancelledError, ConnectionError):
+            # the server is shutting down or the client went away
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(connection, host, port)
+
+
+async def serveStdin(service):
+    '''
+    Serves JSON lines from stdin to stdout until stdin is closed
+    stdin is read in a thread, so that files and terminals work as well as pipes
+    '''
+    loop = asyncio.get_running_loop()
+
+    async def readline():
+        return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+    async def send(data):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    await _serveStream(service, readline, send)
+
+
+def loadGraph(filename):
+    '''
+    Opens a binary snapshot (see CSRGraph.save) or reads an edge list file into a DirectedGraph
+    '''
+    try:
+        return CSRGraph.load(filename)
+    except ValueError:
+        return DirectedGraph(filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph query service answering JSON lines, see QueryService.handle")
+    parser.add_argument("graph", nargs="?", default="1k.txt", help="edge list file or binary snapshot")
+    parser.add_argument("--port", type=int, help="serve over TCP on this port instead of stdin / stdout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--processes", type=int, help="worker processes, 0 to run the searches in the event loop")
+    args = parser.parse_args()
+
+    service = QueryService(loadGraph(args.graph), args.processes)
+
+    async def run():
+        if args.port is None:
+            await serveStdin(service)
+            return
+        server = await serveSocket(service, args.host, args.port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
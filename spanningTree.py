@@ -0,0 +1,247 @@
+import heapq
+import math
+import multiprocessing
+from array import array
+
+from graphProtocol import UndirectedView
+
+
+class UnionFind:
+    '''
+    Disjoint sets over the integers 0..n-1, stored in arrays, with path compression and union by rank
+    '''
+
+    def __init__(self, n):
+        self.__parent = array('i', range(n))
+        self.__rank = bytearray(n)
+        self.__sets = n
+
+    def find(self, x):
+        parent = self.__parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, x, y):
+        '''
+        Merges the sets of x and y
+        :return: True if they were different sets, False if x and y were already in the same set
+        '''
+        x = self.find(x)
+        y = self.find(y)
+        if x == y:
+            return False
+        rank = self.__rank
+        if rank[x] < rank[y]:
+            x, y = y, x
+        self.__parent[y] = x
+        if rank[x] == rank[y]:
+            rank[x] += 1
+        self.__sets -= 1
+        return True
+
+    def extend(self, n):
+        '''
+        Adds singleton sets until the integers 0..n-1 are all covered
+        '''
+        size = len(self.__parent)
+        if n > size:
+            self.__parent.extend(range(size, n))
+            self.__rank.extend(bytes(n - size))
+            self.__sets += n - size
+
+    def getSetsNumber(self):
+        return self.__sets
+
+    def getElementsNumber(self):
+        return len(self.__parent)
+
+
+def _undirected(G):
+    if not hasattr(G, "parseN"):
+        return UndirectedView(G)
+    return G
+
+
+def _edgeArrays(vertices, index, costs):
+    '''
+    Lists every undirected edge once, as vertex positions
+    :return: the arrays xs, ys and the list of costs, edge i linking vertices[xs[i]] and vertices[ys[i]]
+    '''
+    xs = array('i')
+    ys = array('i')
+    cs = []
+    for (x, y), c in costs.items():
+        i = index[x]
+        j = index[y]
+        if i < j:
+            xs.append(i)
+            ys.append(j)
+            cs.append(c)
+    return xs, ys, cs
+
+
+def kruskal(G):
+    '''
+    Kruskal's algorithm: takes the edges cheapest first, keeping those that join two different trees
+    :param G: an undirected graph, any other graph backend is seen through an UndirectedView
+    :return: the total cost and the list of (x, y, cost) edges of a minimum spanning forest
+        (one tree per connected component)
+    '''
+    G = _undirected(G)
+    vertices = list(G.parseX())
+    index = {v: i for i, v in enumerate(vertices)}
+    xs, ys, cs = _edgeArrays(vertices, index, G.getCosts())
+    sets = UnionFind(len(vertices))
+    total = 0
+    edges = []
+    for e in sorted(range(len(cs)), key=cs.__getitem__):
+        if sets.union(xs[e], ys[e]):
+            total += cs[e]
+            edges.append((vertices[xs[e]], vertices[ys[e]], cs[e]))
+            if sets.getSetsNumber() == 1:
+                break
+    return total, edges
+
+
+def prim(G):
+    '''
+    Prim's algorithm with a binary heap, grown again from a new vertex whenever a tree is complete
+    Suits dense graphs better than kruskal, as the edges are never sorted as a whole
+    :param G: an undirected graph, any other graph backend is seen through an UndirectedView
+    :return: the total cost and the list of (x, y, cost) edges of a minimum spanning forest
+    '''
+    G = _undirected(G)
+    costs = G.getCosts()
+    done = set()
+    total = 0
+    edges = []
+    for root in G.parseX():
+        if root in done:
+            continue
+        done.add(root)
+        heap = [(costs[(root, y)], root, y) for y in G.parseN(root) if y != root]
+        heapq.heapify(heap)
+        while heap:
+            c, x, y = heapq.heappop(heap)
+            if y in done:
+                continue
+            done.add(y)
+            total += c
+            edges.append((x, y, c))
+            for z in G.parseN(y):
+                if z not in done:
+                    heapq.heappush(heap, (costs[(y, z)], y, z))
+    return total, edges
+
+
+# state of a worker process, set once by _initWorker so the edges are not sent again every round
+_xs = None
+_ys = None
+_costs = None
+
+
+def _initWorker(xs, ys, costs):
+    global _xs, _ys, _costs
+    _xs = xs
+    _ys = ys
+    _costs = costs
+
+
+def _cheapestEdges(task):
+    '''
+    Finds, among the edges start..end-1, the cheapest one leaving every component
+    Ties are broken by edge number, so that all the workers agree and no cycle can be formed
+    :param task: (start, end, component), component being the array of the component of every vertex
+    :return: a dictionary component -> edge number
+    '''
+    start, end, component = task
+    xs, ys, costs = _xs, _ys, _costs
+    best = {}
+    for e in range(start, end):
+        cx = component[xs[e]]
+        cy = component[ys[e]]
+        if cx == cy:
+            continue
+        c = costs[e]
+        for k in (cx, cy):
+            b = best.get(k)
+            if b is None or c < costs[b] or (c == costs[b] and e < b):
+                best[k] = e
+    return best
+
+
+def boruvka(G, processes=1, chunks=None):
+    '''
+    Borůvka's algorithm: in every round each tree picks its cheapest outgoing edge and all of them are
+    added at once, so there are at most log2(V) rounds; the search for the cheapest edges of a round
+    is split over the edges and can run in a process pool
+    :param G: an undirected graph, any other graph backend is seen through an UndirectedView
+    :param processes: the number of worker processes, os.cpu_count() if None; 1 (the default) runs everything
+        in this process, a pool only pays off on graphs large enough to cover the cost of starting it
+    :param chunks: the number of pieces the edges are split in every round, 4 per process if None
+    :return: the total cost and the list of (x, y, cost) edges of a minimum spanning forest
+    '''
+    G = _undirected(G)
+    vertices = list(G.parseX())
+    n = len(vertices)
+    index = {v: i for i, v in enumerate(vertices)}
+    xs, ys, cs = _edgeArrays(vertices, index, G.getCosts())
+    m = len(cs)
+    sets = UnionFind(n)
+    total = 0
+    edges = []
+
+    pool = None
+    if processes == 1:
+        _initWorker(xs, ys, cs)
+        mapper = map
+        chunks = chunks or 1
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        pool = context.Pool(processes, initializer=_initWorker, initargs=(xs, ys, cs))
+        mapper = pool.map
+        chunks = chunks or 4 * (processes or multiprocessing.cpu_count())
+    try:
+        step = max(1, math.ceil(m / chunks))
+        while m:
+            component = array('i', (sets.find(v) for v in range(n)))
+            best = {}
+            for partial in mapper(_cheapestEdges, [(i, min(i + step, m), component) for i in range(0, m, step)]):
+                for k, e in partial.items():
+                    b = best.get(k)
+                    if b is None or cs[e] < cs[b] or (cs[e] == cs[b] and e < b):
+                        best[k] = e
+            if not best:
+                break
+            for e in set(best.values()):
+                if sets.union(xs[e], ys[e]):
+                    total += cs[e]
+                    edges.append((vertices[xs[e]], vertices[ys[e]], cs[e]))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return total, edges
+
+
+def minimumSpanningForest(G, algorithm="kruskal", processes=1):
+    '''
+    Minimum spanning forest of an undirected graph: a minimum spanning tree of every connected component
+    :param algorithm: "kruskal", "prim" or "boruvka"; they give the same total cost, but may pick
+        different edges when costs are equal
+    :param processes: only used by "boruvka", see boruvka
+    :return: the total cost and the list of (x, y, cost) edges
+    Raises ValueError for an unknown algorithm
+    '''
+    if algorithm == "kruskal":
+        return kruskal(G)
+    if algorithm == "prim":
+        return prim(G)
+    if algorithm == "boruvka":
+        return boruvka(G, processes)
+    raise ValueError("unknown algorithm " + str(algorithm))
@@ -0,0 +1,131 @@
+import os
+import random
+import unittest
+
+import components
+import generators
+import graphAlgorithms
+import graphProtocol
+from graph import DirectedGraph
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _graph(n, edges):
+    g = DirectedGraph(None)
+    for v in range(n):
+        g.addVertex(v)
+    for x, y, c in edges:
+        g.addEdge(x, y, c)
+    return g
+
+
+def _pathCost(g, path):
+    if path is None:
+        return None
+    return sum(g.getCost(x, y) for x, y in zip(path, path[1:]))
+
+
+def _isTopological(g, order):
+    if order is None:
+        return None
+    position = {v: i for i, v in enumerate(order)}
+    return len(order) == g.getVerticesNumber() and all(position[x] < position[y] for x, y in g.getCosts())
+
+
+def _criticalPathLength(g):
+    try:
+        return (graphAlgorithms.criticalPath(g) or (None,))[0]
+    except ValueError:
+        # negative durations are rejected
+        return ValueError
+
+
+def _components(g, algorithm):
+    count, component = components.stronglyConnectedComponents(g, algorithm)
+    members = components.componentMembers(count, component)
+    return sorted(sorted(vertices) for vertices in members)
+
+
+# every algorithm of the protocol, reduced to a result that does not depend on the order of the neighbours
+# (CSRGraph keeps its rows sorted, the other backends keep the insertion order)
+ALGORITHMS = (
+    ("BFS", lambda g: graphAlgorithms.BFS(g, 0)[0]),
+    ("shortestPathReverseBFS", lambda g: len(graphAlgorithms.shortestPathReverseBFS(g, 0, 5) or ())),
+    ("DFS", lambda g: sorted(graphAlgorithms.DFS(g))),
+    ("BellmanFord", lambda g: graphAlgorithms.BellmanFord(g, g.getCosts(), 0)[0]),
+    ("SPFA", lambda g: graphAlgorithms.SPFA(g, g.getCosts(), 0)[0]),
+    ("Dijkstra", lambda g: graphAlgorithms.Dijkstra(g, g.getCosts(), 0)[0]
+     if graphAlgorithms.nonNegativeCosts(g) else None),
+    ("bidirectionalDijkstra", lambda g: graphAlgorithms.bidirectionalDijkstra(g, g.getCosts(), 0, 5)[0]
+     if graphAlgorithms.nonNegativeCosts(g) else None),
+    ("AStar", lambda g: graphAlgorithms.AStar(g, g.getCosts(), 0, 5, lambda v: 0)[0]
+     if graphAlgorithms.nonNegativeCosts(g) else None),
+    ("lowestCostPath", lambda g: _pathCost(g, graphAlgorithms.lowestCostPath(g, 0, 5))),
+    ("topologicalSortKahn", lambda g: _isTopological(g, graphAlgorithms.topologicalSortKahn(g))),
+    ("DAGPaths", lambda g: (graphAlgorithms.DAGPaths(g, g.getCosts(), 0) or (None,))[0]),
+    ("criticalPath", lambda g: _criticalPathLength(g)),
+    ("tarjan", lambda g: _components(g, "tarjan")),
+    ("kosaraju", lambda g: _components(g, "kosaraju")),
+)
+
+
+class BackendMatrixTest(unittest.TestCase):
+    '''
+    Runs every algorithm on every backend of graphProtocol.BACKENDS and checks that they all agree
+    with DirectedGraph, on a general graph, a DAG, a graph with negative costs and one with a negative cycle
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(0)
+        dag = list(generators.randomDAG(300, 1200, seed=1))
+        cls.graphs = {
+            "1k": DirectedGraph(os.path.join(ROOT, "1k.txt")),
+            "dag": _graph(300, dag),
+            "negativeDag": _graph(300, [(x, y, c - 60) for x, y, c in dag]),
+            "negativeCycle": _graph(50, [(rnd.randrange(50), rnd.randrange(50), rnd.randint(-5, 20))
+                                         for _ in range(200)] + [(0, 1, -10), (1, 0, 1)]),
+        }
+
+    def testConformance(self):
+        for name, reference in self.graphs.items():
+            for backend in graphProtocol.BACKENDS:
+                with self.subTest(graph=name, backend=backend):
+                    g = graphProtocol.toBackend(reference, backend)
+                    self.assertEqual([], graphProtocol.checkConformance(g, reference))
+
+    def testAlgorithms(self):
+        for name, reference in self.graphs.items():
+            expected = {algorithm: run(reference) for algorithm, run in ALGORITHMS}
+            for backend in graphProtocol.BACKENDS:
+                g = graphProtocol.toBackend(reference, backend)
+                for algorithm, run in ALGORITHMS:
+                    with self.subTest(graph=name, backend=backend, algorithm=algorithm):
+                        self.assertEqual(expected[algorithm], run(g))
+
+    def testMutations(self):
+        rnd = random.Random(2)
+        for backend in graphProtocol.BACKENDS:
+            if backend == "csr":
+                continue
+            reference = _graph(40, [])
+            g = graphProtocol.toBackend(reference, backend)
+            for _ in range(500):
+                x, y = rnd.randrange(40), rnd.randrange(40)
+                operation = rnd.random()
+                for graph in (reference, g):
+                    if operation < 0.6:
+                        graph.addEdge(x, y, (7 * x + y) % 9 + 1)
+                    elif operation < 0.8:
+                        graph.removeEdge(x, y)
+                    else:
+                        graph.setCost(x, y, x + y)
+            with self.subTest(backend=backend):
+                self.assertEqual([], graphProtocol.checkConformance(g, reference))
+                self.assertEqual(graphAlgorithms.BellmanFord(reference, reference.getCosts(), 0)[0],
+                                 graphAlgorithms.BellmanFord(g, g.getCosts(), 0)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
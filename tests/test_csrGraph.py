@@ -0,0 +1,85 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from csrGraph import CSRGraph, SNAPSHOT_MAGIC, SNAPSHOT_VERSION
+from graph import DirectedGraph
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADER = struct.Struct("<8sIIqq")
+
+
+class SnapshotTest(unittest.TestCase):
+    '''
+    Round trips of CSRGraph.save / CSRGraph.load on the sample graphs, and rejection of damaged snapshots
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def assertSameGraph(self, expected, actual):
+        self.assertEqual(expected.getVerticesNumber(), actual.getVerticesNumber())
+        for v in expected.getVertices():
+            self.assertEqual(sorted(expected.getOutbound(v)), list(actual.getOutbound(v)))
+            self.assertEqual(sorted(expected.getInbound(v)), list(actual.getInbound(v)))
+        self.assertEqual(dict(expected.getCosts()), dict(actual.getCosts()))
+
+    def testRoundTrip(self):
+        for filename in ("1k.txt", "10k.txt"):
+            g = DirectedGraph(os.path.join(ROOT, filename))
+            path = self.path(filename + ".snapshot")
+            CSRGraph.fromDirectedGraph(g).save(path)
+            with open(path, "rb") as f:
+                original = f.read()
+            for mmap in (True, False):
+                with self.subTest(filename=filename, mmap=mmap):
+                    loaded = CSRGraph.load(path, mmap)
+                    self.assertSameGraph(g, loaded)
+                    self.assertSameGraph(g, DirectedGraph.load(path, mmap))
+                    again = self.path(filename + ".again")
+                    loaded.save(again)
+                    with open(again, "rb") as f:
+                        self.assertEqual(original, f.read())
+
+    def testDirectedGraphSave(self):
+        g = DirectedGraph(os.path.join(ROOT, "1k.txt"))
+        path = self.path("1k.snapshot")
+        g.save(path)
+        self.assertSameGraph(g, DirectedGraph.load(path))
+
+    def damaged(self, data):
+        path = self.path("damaged.snapshot")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def assertRejected(self, data):
+        path = self.damaged(data)
+        for mmap in (True, False):
+            with self.subTest(size=len(data), mmap=mmap):
+                self.assertRaises(ValueError, CSRGraph.load, path, mmap)
+
+    def testRejectsDamagedFiles(self):
+        path = self.path("1k.snapshot")
+        CSRGraph.fromFile(os.path.join(ROOT, "1k.txt")).save(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, little, n, m = HEADER.unpack_from(data)
+        self.assertEqual((magic, version), (SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+        body = data[HEADER.size:]
+
+        for size in (0, 4, HEADER.size - 1, HEADER.size, HEADER.size + 8 * (n + 1), len(data) - 1):
+            self.assertRejected(data[:size])
+        self.assertRejected(HEADER.pack(b"NOTGRAPH", version, little, n, m) + body)
+        self.assertRejected(HEADER.pack(magic, version + 1, little, n, m) + body)
+        self.assertRejected(HEADER.pack(magic, version, not little, n, m) + body)
+        self.assertRejected(HEADER.pack(magic, version, little, n, m + 1) + body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from edgeStream import edgeListStats
+from graph import DirectedGraph
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class EdgeListStatsTest(unittest.TestCase):
+    '''
+    edgeListStats must describe the graph the loaders build from the same file
+    '''
+
+    def assertMatchesGraph(self, stats, g):
+        self.assertEqual(g.getVerticesNumber(), stats["vertices"])
+        self.assertEqual(len(g.getCosts()), stats["edges"])
+        self.assertEqual(len(g.getCosts()), stats["costs"]["count"])
+        outDegrees = Counter(g.getOutDegree(v) for v in g.getVertices())
+        inDegrees = Counter(g.getInDegree(v) for v in g.getVertices())
+        self.assertEqual(dict(outDegrees), stats["outDegreeHistogram"])
+        self.assertEqual(dict(inDegrees), stats["inDegreeHistogram"])
+        self.assertEqual(sum(1 for x, y in g.getCosts() if x == y), stats["selfLoops"])
+        costs = list(g.getCosts().values())
+        self.assertEqual(min(costs), stats["costs"]["min"])
+        self.assertEqual(max(costs), stats["costs"]["max"])
+        self.assertAlmostEqual(sum(costs) / len(costs), stats["costs"]["mean"])
+
+    def testSampleGraphs(self):
+        for filename in ("1k.txt", "10k.txt"):
+            with self.subTest(filename=filename):
+                path = os.path.join(ROOT, filename)
+                stats = edgeListStats(path, chunkSize=1000)
+                self.assertMatchesGraph(stats, DirectedGraph(path))
+                self.assertEqual(0, stats["duplicateEdges"])
+
+    def testDuplicatedEdge(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "duplicated.txt")
+            with open(path, "w") as f:
+                # 0 -> 1 appears again with another cost, in a later chunk when chunkSize is 2
+                f.write("3 5\n0 1 5\n1 2 7\n2 2 1\n0 1 100\n0 1 -3\n")
+            g = DirectedGraph(path)
+            for chunkSize in (2, 65536):
+                with self.subTest(chunkSize=chunkSize):
+                    stats = edgeListStats(path, chunkSize)
+                    self.assertMatchesGraph(stats, g)
+                    self.assertEqual(3, stats["edges"])
+                    self.assertEqual(2, stats["duplicateEdges"])
+                    self.assertEqual(1, stats["selfLoops"])
+                    self.assertEqual({"count": 3, "min": 1, "max": 7, "mean": 13 / 3},
+                                     {key: stats["costs"][key] for key in ("count", "min", "max", "mean")})
+                    self.assertEqual(1, stats["weaklyConnectedComponents"]["count"])
+
+
+if __name__ == "__main__":
+    unittest.main()
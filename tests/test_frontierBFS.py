@@ -0,0 +1,63 @@
+import os
+import random
+import unittest
+
+import graphAlgorithms
+from csrGraph import CSRGraph
+from frontierBFS import frontierBFS
+from graph import DirectedGraph
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FrontierBFSTest(unittest.TestCase):
+    '''
+    frontierBFS must give the distances of BFS and a valid BFS parent for every vertex,
+    whichever direction its levels run in and with or without worker processes
+    '''
+
+    def assertValidBFS(self, g, start, result):
+        distances, parent = result
+        expected = graphAlgorithms.BFS(g, start)
+        self.assertEqual(expected[0], distances)
+        self.assertEqual(expected[1].keys(), parent.keys())
+        for v, x in parent.items():
+            if x is None:
+                self.assertEqual(start, v)
+            else:
+                self.assertEqual(distances[x] + 1, distances[v])
+                self.assertTrue(g.edgeExists(x, v))
+
+    def testSampleGraph(self):
+        dictGraph = DirectedGraph(os.path.join(ROOT, "10k.txt"))
+        for g in (dictGraph, CSRGraph.fromDirectedGraph(dictGraph)):
+            for start in range(10):
+                # default switching, always bottom-up, always top-down
+                for options in ({}, {"alpha": 10 ** 6, "beta": 1}, {"alpha": 10 ** -6}):
+                    with self.subTest(graph=type(g).__name__, start=start, options=options):
+                        self.assertValidBFS(g, start, frontierBFS(g, start, **options))
+
+    def testWorkerProcesses(self):
+        g = CSRGraph.fromFile(os.path.join(ROOT, "10k.txt"))
+        for start in range(3):
+            for options in ({}, {"alpha": 10 ** 6, "beta": 1}):
+                with self.subTest(start=start, options=options):
+                    self.assertValidBFS(g, start, frontierBFS(g, start, processes=2, chunks=3, minParallel=1,
+                                                              **options))
+
+    def testRandomGraphs(self):
+        rnd = random.Random(0)
+        for _ in range(100):
+            n = rnd.randint(1, 30)
+            g = DirectedGraph(None)
+            for v in range(n):
+                g.addVertex(v)
+            for _ in range(rnd.randint(0, 80)):
+                g.addEdge(rnd.randrange(n), rnd.randrange(n), 1)
+            start = rnd.randrange(n)
+            for options in ({}, {"alpha": 10 ** 6, "beta": 1}):
+                self.assertValidBFS(g, start, frontierBFS(g, start, **options))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import random
+import unittest
+
+import generators
+import graphAlgorithms
+from graph import DirectedGraph
+
+
+def _graph(n, edges):
+    g = DirectedGraph(None)
+    for v in range(n):
+        g.addVertex(v)
+    for x, y, c in edges:
+        g.addEdge(x, y, c)
+    return g
+
+
+class CriticalPathTest(unittest.TestCase):
+
+    def testSchedule(self):
+        g = _graph(5, [(0, 1, 3), (0, 2, 2), (1, 3, 4), (2, 3, 1), (3, 4, 2)])
+        length, earliest, latest, slack, path = graphAlgorithms.criticalPath(g)
+        self.assertEqual(9, length)
+        self.assertEqual({0: 0, 1: 3, 2: 2, 3: 7, 4: 9}, earliest)
+        self.assertEqual({0: 0, 1: 3, 2: 6, 3: 7, 4: 9}, latest)
+        self.assertEqual(4, slack[2])
+        self.assertEqual([0, 1, 3, 4], path)
+
+    def testRandomDAGs(self):
+        for seed in range(50):
+            n = random.Random(seed).randint(2, 40)
+            g = _graph(n, generators.randomDAG(n, 3 * n, seed, maxCost=20))
+            length, earliest, latest, slack, path = graphAlgorithms.criticalPath(g)
+            with self.subTest(seed=seed):
+                self.assertTrue(path)
+                self.assertEqual(0, earliest[path[0]])
+                self.assertEqual(length, earliest[path[-1]])
+                self.assertEqual(length, sum(g.getCost(x, y) for x, y in zip(path, path[1:])))
+                self.assertTrue(all(0 <= slack[v] and latest[v] <= length for v in g.getVertices()))
+
+    def testNegativeDurationIsRejected(self):
+        g = _graph(4, [(0, 1, 3), (1, 2, -5), (2, 3, 1)])
+        self.assertRaises(ValueError, graphAlgorithms.criticalPath, g)
+
+    def testNotDAG(self):
+        self.assertIsNone(graphAlgorithms.criticalPath(_graph(2, [(0, 1, 1), (1, 0, 1)])))
+
+
+if __name__ == "__main__":
+    unittest.main()
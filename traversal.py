@@ -0,0 +1,89 @@
+from collections import deque
+
+from csrGraph import CSRGraph
+
+DISCOVER = "discover"
+FINISH = "finish"
+
+
+class _Marks(dict):
+    '''
+    Visited marks for graphs with arbitrary vertices, read and written like a bytearray
+    '''
+
+    def __missing__(self, v):
+        return 0
+
+
+def newMarks(G):
+    '''
+    Returns an empty visited state for the vertices of G: a compact bytearray indexed by vertex
+    for array-backed graphs, a dictionary otherwise. Both are used as marks[v] = 1 / if marks[v]
+    '''
+    if isinstance(G, CSRGraph):
+        return bytearray(G.getVerticesNumber())
+    return _Marks()
+
+
+def bfs(G, start, marks=None):
+    '''
+    Breadth-first traversal as a generator, the caller can stop it at any point
+    :param G: the graph to be traversed
+    :param start: the starting vertex
+    :param marks: the visited state, see newMarks; vertices already marked are not visited
+    :return: yields (vertex, depth, parent) in the order the vertices are reached, parent being None for start
+    '''
+    if marks is None:
+        marks = newMarks(G)
+    marks[start] = 1
+    yield start, 0, None
+    queue = deque([(start, 0)])
+    while queue:
+        x, depth = queue.popleft()
+        depth += 1
+        for y in G.getOutbound(x):
+            if not marks[y]:
+                marks[y] = 1
+                yield y, depth, x
+                queue.append((y, depth))
+
+
+def dfsEvents(G, start=None, marks=None):
+    '''
+    Depth-first traversal with an explicit stack, so long chains do not hit the recursion limit
+    :param G: the graph to be traversed
+    :param start: the starting vertex, if None every vertex is used in turn and the whole depth-first forest is visited
+    :param marks: the visited state, see newMarks; vertices already marked are not visited
+    :return: yields (event, vertex, depth, parent), event being DISCOVER when the vertex is first reached
+        and FINISH when all its descendants are done
+    '''
+    if marks is None:
+        marks = newMarks(G)
+    roots = G.getVertices() if start is None else (start,)
+    for root in roots:
+        if marks[root]:
+            continue
+        marks[root] = 1
+        yield DISCOVER, root, 0, None
+        stack = [(root, iter(G.getOutbound(root)), None)]
+        while stack:
+            x, neighbours, parent = stack[-1]
+            for y in neighbours:
+                if not marks[y]:
+                    marks[y] = 1
+                    yield DISCOVER, y, len(stack), x
+                    stack.append((y, iter(G.getOutbound(y)), x))
+                    break
+            else:
+                stack.pop()
+                yield FINISH, x, len(stack), parent
+
+
+def dfs(G, start=None, marks=None):
+    '''
+    Depth-first traversal as a generator, see dfsEvents
+    :return: yields (vertex, depth, parent) in discovery order
+    '''
+    for event, v, depth, parent in dfsEvents(G, start, marks):
+        if event == DISCOVER:
+            yield v, depth, parent
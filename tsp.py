@@ -0,0 +1,382 @@
+import math
+import time
+
+import instrumentation
+import spanningTree
+from graphProtocol import UndirectedView
+
+
+def tourCost(G, tour):
+    '''
+    Returns the total cost of a closed tour given as a list of vertices (the last one links back to the
+    first one), math.inf if one of its edges does not exist
+    '''
+    costs = G.getCosts()
+    total = 0
+    for i in range(len(tour)):
+        total += costs.get((tour[i - 1], tour[i]), math.inf)
+    return total
+
+
+def neighbourLists(G, k=8):
+    '''
+    Returns a dictionary vertex -> its k cheapest neighbours, cheapest first
+    '''
+    costs = G.getCosts()
+    return {x: sorted(set(G.parseN(x)) - {x}, key=lambda y: costs[(x, y)])[:k] for x in G.parseX()}
+
+
+def nearestNeighbourTour(G, start):
+    '''
+    Builds a tour by always moving to the cheapest unvisited neighbour
+    :param G: an undirected graph
+    :param start: the starting vertex
+    :return: the tour as a list of vertices, None if a dead end is reached or the last vertex
+        has no edge back to start
+    '''
+    costs = G.getCosts()
+    n = len(G.parseX())
+    tour = [start]
+    visited = {start}
+    a = start
+    while len(tour) < n:
+        best = None
+        bestCost = math.inf
+        for v in G.parseN(a):
+            if v not in visited and costs[(a, v)] < bestCost:
+                best = v
+                bestCost = costs[(a, v)]
+        if best is None:
+            return None
+        a = best
+        visited.add(a)
+        tour.append(a)
+    if (a, start) not in costs:
+        return None
+    return tour
+
+
+def multiStartNearestNeighbour(G, deadline=math.inf):
+    '''
+    Runs nearestNeighbourTour from every vertex in turn, until the deadline (a time.perf_counter() value)
+    :return: the cheapest tour found and its cost, (None, math.inf) if every start failed
+    '''
+    bestTour = None
+    bestCost = math.inf
+    starts = 0
+    for start in G.parseX():
+        starts += 1
+        tour = nearestNeighbourTour(G, start)
+        if tour is not None:
+            cost = tourCost(G, tour)
+            if cost < bestCost:
+                bestTour, bestCost = tour, cost
+        if bestTour is not None and time.perf_counter() > deadline:
+            break
+    instrumentation.count("iterations", starts)
+    return bestTour, bestCost
+
+
+def _reverse(tour, pos, i, j):
+    '''
+    Reverses the cyclic segment tour[i..j] in place and updates the positions
+    '''
+    n = len(tour)
+    for _ in range((((j - i) % n) + 1) // 2):
+        a = tour[i]
+        b = tour[j]
+        tour[i] = b
+        pos[b] = i
+        tour[j] = a
+        pos[a] = j
+        i = (i + 1) % n
+        j = (j - 1) % n
+
+
+def twoOpt(G, tour, neighbours=None, deadline=math.inf):
+    '''
+    Improves a tour in place with 2-opt moves, only trying to link a vertex to its candidate neighbours
+    Vertices whose surroundings did not change since they last failed to improve are skipped (don't-look bits)
+    :param G: an undirected graph
+    :param tour: a valid tour, changed in place
+    :param neighbours: the result of neighbourLists, computed if not given
+    :param deadline: a time.perf_counter() value after which the search stops
+    :return: the tour
+    '''
+    n = len(tour)
+    if n < 4:
+        return tour
+    if neighbours is None:
+        neighbours = neighbourLists(G)
+    costs = G.getCosts()
+    pos = {v: i for i, v in enumerate(tour)}
+    active = list(tour)
+    queued = set(tour)
+    moves = 0
+    while active and time.perf_counter() < deadline:
+        a = active.pop()
+        queued.discard(a)
+        improved = False
+        for direction in (1, -1):
+            i = pos[a]
+            b = tour[(i + direction) % n]
+            ab = costs[(a, b)]
+            for c in neighbours[a]:
+                ac = costs[(a, c)]
+                if ac >= ab:
+                    break
+                j = pos[c]
+                d = tour[(j + direction) % n]
+                if d == a or c == b:
+                    continue
+                bd = costs.get((b, d))
+                if bd is None:
+                    continue
+                if ac + bd < ab + costs[(c, d)]:
+                    if direction == 1:
+                        _reverse(tour, pos, (i + 1) % n, j)
+                    else:
+                        _reverse(tour, pos, j, (i - 1) % n)
+                    for v in (a, b, c, d):
+                        if v not in queued:
+                            queued.add(v)
+                            active.append(v)
+                    moves += 1
+                    improved = True
+                    break
+            if improved:
+                break
+    instrumentation.count("moves", moves)
+    return tour
+
+
+def orOpt(G, tour, neighbours=None, deadline=math.inf):
+    '''
+    Improves a tour in place by moving segments of 1 to 3 consecutive vertices next to one of the
+    candidate neighbours of their end vertices, possibly reversed
+    :param G: an undirected graph
+    :param tour: a valid tour, changed in place
+    :param neighbours: the result of neighbourLists, computed if not given
+    :param deadline: a time.perf_counter() value after which the search stops
+    :return: the tour
+    '''
+    n = len(tour)
+    if n < 5:
+        return tour
+    if neighbours is None:
+        neighbours = neighbourLists(G)
+    costs = G.getCosts()
+    inf = math.inf
+    moves = 0
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        pos = {v: i for i, v in enumerate(tour)}
+        for length in (1, 2, 3):
+            for i in range(n):
+                segment = [tour[(i + k) % n] for k in range(length)]
+                first, last = segment[0], segment[-1]
+                p = tour[(i - 1) % n]
+                q = tour[(i + length) % n]
+                removed = costs[(p, first)] + costs[(last, q)] - costs.get((p, q), inf)
+                if removed <= 0:
+                    continue
+                for c in neighbours[first] + neighbours[last]:
+                    j = pos[c]
+                    if (j - i) % n < length or c == p:
+                        continue
+                    d = tour[(j + 1) % n]
+                    if d in segment:
+                        continue
+                    cd = costs[(c, d)]
+                    # insert between c and d, keeping or reversing the segment
+                    forward = costs.get((c, first), inf) + costs.get((last, d), inf) - cd
+                    backward = costs.get((c, last), inf) + costs.get((first, d), inf) - cd
+                    if min(forward, backward) < removed:
+                        if backward < forward:
+                            segment.reverse()
+                        rest = [v for v in tour if v not in segment]
+                        k = rest.index(c) + 1
+                        tour[:] = rest[:k] + segment + rest[k:]
+                        moves += 1
+                        improved = True
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+    instrumentation.count("moves", moves)
+    return tour
+
+
+def heldKarp(G):
+    '''
+    Exact lowest cost tour with the Held-Karp dynamic programming over subsets, O(2^n * n^2)
+    Only meant for small graphs
+    :return: the tour and its cost, (None, math.inf) if the graph has no hamiltonian cycle
+    '''
+    vertices = list(G.parseX())
+    n = len(vertices)
+    if n == 0:
+        return None, math.inf
+    if n == 1:
+        return vertices, 0
+    costs = G.getCosts()
+    inf = math.inf
+    w = [[costs.get((x, y), inf) for y in vertices] for x in vertices]
+    full = 1 << n
+    # dp[mask][j]: lowest cost of a path starting at vertex 0, visiting mask and ending at j
+    dp = [[inf] * n for _ in range(full)]
+    parent = [[-1] * n for _ in range(full)]
+    dp[1][0] = 0
+    for mask in range(1, full, 2):
+        row = dp[mask]
+        for j in range(n):
+            d = row[j]
+            if d == inf:
+                continue
+            wj = w[j]
+            for k in range(1, n):
+                bit = 1 << k
+                if mask & bit or wj[k] == inf:
+                    continue
+                nd = d + wj[k]
+                if nd < dp[mask | bit][k]:
+                    dp[mask | bit][k] = nd
+                    parent[mask | bit][k] = j
+    last = full - 1
+    best = inf
+    end = -1
+    for j in range(1, n):
+        if dp[last][j] + w[j][0] < best:
+            best = dp[last][j] + w[j][0]
+            end = j
+    if end == -1:
+        return None, inf
+
+    tour = []
+    mask = last
+    while end != -1:
+        tour.append(vertices[end])
+        mask, end = mask ^ (1 << end), parent[mask][end]
+    tour.reverse()
+    return tour, best
+
+
+def doubleTreeTour(G, tree=None):
+    '''
+    Visits the vertices in the preorder of a minimum spanning tree, skipping the ones already seen
+    When the costs obey the triangle inequality the tour costs at most twice the tree, so at most twice the optimum
+    :param G: an undirected graph
+    :param tree: the edges of a minimum spanning tree of G as (x, y, cost), computed with kruskal if not given
+    :return: the tour, None if it uses a missing edge (G is not complete) or the tree does not span G
+    '''
+    if tree is None:
+        tree = spanningTree.kruskal(G)[1]
+    vertices = list(G.parseX())
+    if not vertices or len(tree) != len(vertices) - 1:
+        return None
+    adjacent = {v: [] for v in vertices}
+    for x, y, c in tree:
+        adjacent[x].append(y)
+        adjacent[y].append(x)
+    tour = []
+    seen = {vertices[0]}
+    stack = [vertices[0]]
+    while stack:
+        x = stack.pop()
+        tour.append(x)
+        for y in reversed(adjacent[x]):
+            if y not in seen:
+                seen.add(y)
+                stack.append(y)
+    if tourCost(G, tour) == math.inf:
+        return None
+    return tour
+
+
+def tourLowerBound(G, special=None):
+    '''
+    Returns the 1-tree lower bound of the cost of a hamiltonian cycle: removing a vertex and its two tour edges
+    from any tour leaves a spanning tree of the other vertices, so no tour is cheaper than a minimum spanning
+    tree without that vertex plus its two cheapest edges. Unlike the weight of a minimum spanning tree of G,
+    the bound holds with negative costs too, and is reached when the cheapest 1-tree is itself a tour
+    :param special: the vertex left out of the tree; by default the one whose second cheapest edge costs most,
+        which usually gives the highest bound
+    :return: the bound, math.inf if G has no hamiltonian cycle because G is not connected or special has fewer
+        than two neighbours, -math.inf if G has fewer than 3 vertices
+    '''
+    vertices = list(G.parseX())
+    if len(vertices) < 3:
+        return -math.inf
+    costs = G.getCosts()
+    cheapest = {x: sorted(costs[(x, y)] for y in G.parseN(x) if y != x)[:2] for x in vertices}
+    if special is None:
+        special = max(vertices, key=lambda x: cheapest[x][1] if len(cheapest[x]) == 2 else math.inf)
+    if len(cheapest[special]) < 2:
+        return math.inf
+    vertices.remove(special)
+    index = {v: i for i, v in enumerate(vertices)}
+    edges = sorted((c, index[x], index[y]) for (x, y), c in costs.items()
+                   if x != special and y != special and index[x] < index[y])
+    sets = spanningTree.UnionFind(len(vertices))
+    total = sum(cheapest[special])
+    for c, x, y in edges:
+        if sets.union(x, y):
+            total += c
+            if sets.getSetsNumber() == 1:
+                break
+    if sets.getSetsNumber() > 1:
+        return math.inf
+    return total
+
+
+def solveTSP(G, timeBudget=1.0, exactLimit=12):
+    '''
+    Finds a low cost hamiltonian cycle of an undirected graph
+    Graphs with at most exactLimit vertices are solved exactly with heldKarp; larger ones start from the
+    cheaper of the double tree tour and the best multi-start nearest neighbour tour found in a quarter of
+    the time budget, improved with twoOpt and orOpt until nothing changes, the tour reaches the 1-tree lower
+    bound (see tourLowerBound) or the time is up. Disconnected graphs are rejected without any search
+    :param G: an undirected graph, any other graph backend is seen through an UndirectedView
+    :param timeBudget: the number of seconds the heuristics may use
+    :param exactLimit: the largest number of vertices solved exactly
+    :return: the closed tour (the first vertex repeated at the end) and its total cost,
+        None if no hamiltonian cycle was found
+    '''
+    if not hasattr(G, "parseN"):
+        G = UndirectedView(G)
+    start = time.perf_counter()
+    deadline = start + timeBudget
+    n = len(G.parseX())
+    with instrumentation.phase("spanningTree"):
+        treeCost, tree = spanningTree.kruskal(G)
+    if len(tree) < n - 1:
+        return None
+    if n <= exactLimit:
+        with instrumentation.phase("heldKarp"):
+            tour, cost = heldKarp(G)
+    else:
+        # leave most of the time to the local search
+        with instrumentation.phase("nearestNeighbour"):
+            tour, cost = multiStartNearestNeighbour(G, start + timeBudget / 4)
+        treeTour = doubleTreeTour(G, tree)
+        if treeTour is not None and tourCost(G, treeTour) < cost:
+            tour, cost = treeTour, tourCost(G, treeTour)
+        if tour is not None:
+            neighbours = neighbourLists(G)
+            with instrumentation.phase("lowerBound"):
+                bound = tourLowerBound(G)
+            while cost > bound and time.perf_counter() < deadline:
+                with instrumentation.phase("twoOpt"):
+                    twoOpt(G, tour, neighbours, deadline)
+                with instrumentation.phase("orOpt"):
+                    orOpt(G, tour, neighbours, deadline)
+                newCost = tourCost(G, tour)
+                if newCost >= cost:
+                    break
+                cost = newCost
+            cost = tourCost(G, tour)
+    if tour is None:
+        return None
+    return tour + tour[:1], cost
@@ -1,6 +1,8 @@
 
 import time
 
+from graph import readEdgeList, uniqueEdges
+
 class GraphException(Exception):
     '''
     Exception class for graph errors
@@ -57,7 +59,8 @@ class Graph:
         - test if (x,y) is an edge
       Functions for creating the graph:
         -
-      Representation : vector of lists of outbound neighbours
+      Representation : for every vertex an insertion ordered dictionary whose keys are its
+        outbound (inbound) neighbours, so edge checks, additions and removals are O(1)
     '''
 
     def __init__(self, n, edges):
@@ -72,12 +75,12 @@ class Graph:
         self.__cost = EdgeProperty(n, edges)
 
         for i in range(n):
-            self.__out[i] = []
-            self.__in[i] = []
+            self.__out[i] = {}
+            self.__in[i] = {}
 
         for edge in edges:
-            self.__out[edge[0]].append(edge[1])
-            self.__in[edge[1]].append(edge[0])
+            self.__out[edge[0]][edge[1]] = None
+            self.__in[edge[1]][edge[0]] = None
 
     def parseX(self):
         '''
@@ -89,13 +92,13 @@ class Graph:
         '''
         Returns an iterable containing all the outbound neighbours of x
         '''
-        return self.__out[x]
+        return self.__out[x].keys()
 
     def parseNin(self, x):
         '''
         Returns an iterable containing all the inbound neighbours of x
         '''
-        return self.__in[x]
+        return self.__in[x].keys()
 
     def getN(self):
         '''
@@ -189,8 +192,8 @@ class Graph:
         #     raise GraphException("Invalid vertex!")
         # if y not in self.__in:
         #     raise GraphException("Invalid vertex!")
-        self.__out[x].append(y)
-        self.__in[y].append(x)
+        self.__out[x][y] = None
+        self.__in[y][x] = None
 
     def removeEdge(self, x, y):
         '''
@@ -204,8 +207,8 @@ class Graph:
         if y not in self.__in:
             raise GraphException("Invalid vertex!")
         self.removeCost(x, y)
-        self.__out[x].remove(y)
-        self.__in[y].remove(x)
+        del self.__out[x][y]
+        del self.__in[y][x]
 
     def isVertex(self, v):
         '''
@@ -226,8 +229,8 @@ class Graph:
         # if v in self.__in:
         #     raise GraphException("Vertex already exists!")
         self.__n += 1
-        self.__in[v] = []
-        self.__out[v] = []
+        self.__in[v] = {}
+        self.__out[v] = {}
 
     def removeVerex(self, v):
         '''
@@ -239,10 +242,10 @@ class Graph:
         #     raise GraphException("Invalid vertex!")
         for y in self.parseNout(v):
             self.removeCost(v, y)
-            self.__in[y].remove(v)
+            del self.__in[y][v]
         for x in self.parseNin(v):
             self.removeCost(x, v)
-            self.__out[x].remove(v)
+            del self.__out[x][v]
 
         del self.__in[v]
         del self.__out[v]
@@ -271,21 +274,13 @@ def readGraphFromFile1():
                 g.setCost(edge[0], edge[1], edge[2])
         return g
 
-def readGraphFromFile():
+def readGraphFromFile(filename="1k.txt"):
     '''
     Read a graph from file and return an instance of Graph
     '''
-    edges = []
-    with open("1k.txt", "r") as f:
-        line1 = f.readline()
-        line1 = line1.split(" ")
-        edges = []
-        for line in f.readlines():
-            line = line.split(" ")
-            if len(line) >= 3:
-                edge = [int(line[0]), int(line[1]), int(line[2])]
-                edges.append(edge)
-        return Graph(int(line1[0]), edges)
+    n, xs, ys, costs = readEdgeList(filename)
+    edges = [(x, y, c) for (x, y), c in uniqueEdges(xs, ys, costs).items()]
+    return Graph(n, edges)
 
 def testBigGraph():
 